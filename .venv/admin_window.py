@@ -0,0 +1,1076 @@
+# admin_window.py
+import logging
+import os
+import sys
+import threading
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QMessageBox,
+                             QHeaderView, QInputDialog,
+                             QDialog, QVBoxLayout, QFormLayout, QLineEdit,
+                             QDialogButtonBox, QLabel, QComboBox,
+                             QFileDialog, QProgressDialog)
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QStandardItemModel, QStandardItem
+from PyQt5 import uic
+from config import Database
+from table_model import PagedTableModel
+from workers import QueryDispatcher, ProgressReporter
+import exporter
+import importer
+
+# Задержка поиска при вводе (мс) и ограничение числа результатов поиска при вводе
+SEARCH_DELAY_MS = 300
+SEARCH_LIMIT = 500
+# Период обновления статистики запросов в строке состояния (мс)
+METRICS_INTERVAL_MS = 2000
+
+log = logging.getLogger(__name__)
+
+# Форма разбирается один раз при импорте модуля, а не при каждом открытии окна
+Ui_AdminWindow, _ = uic.loadUiType(os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                'admin_window.ui'))
+
+
+class AdminWindow(QMainWindow, Ui_AdminWindow):
+    def __init__(self, user_info, auth_window, db=None):
+        super().__init__()
+        self.setupUi(self)
+
+        self.user_info = user_info
+        self.auth_window = auth_window  # Сохраняем ссылку на окно авторизации
+        # Соединение окна авторизации используется повторно; свое закрывается при выходе
+        self.owns_db = db is None
+        self.db = Database() if db is None else db
+        self.queries = QueryDispatcher(self.db, self)
+        # Флаги отмены фоновых импорта и выгрузки: ключ запроса -> threading.Event
+        self.cancel_events = {}
+        # Источник данных каждой таблицы для выгрузки: ключ -> (метод Database, аргументы)
+        self.export_sources = {}
+        # Фермеры для выпадающих списков (ID и ФИО) и вкладки, данные которых уже загружены
+        self.farmer_names = None
+        self.loaded_tabs = set()
+
+        self.setup_ui()
+        self.connect_signals()
+        self.load_initial_data()
+        self.apply_role_permissions()
+
+        role_title = "Администратор" if user_info['role'] == 'Администратор' else "Фермер"
+        self.setWindowTitle(f"{role_title}: {user_info['full_name']}")
+        log.info("✓ Окно администратора создано для пользователя: %s", user_info['full_name'])
+
+    def setup_ui(self):
+        """Настройка интерфейса"""
+        # Настройка таблиц
+        tables = [self.table_reports, self.table_farmers,
+                  self.table_products, self.table_needs]
+        for table in tables:
+            table.setModel(PagedTableModel(table))
+            table.horizontalHeader().setStretchLastSection(True)
+            # Ширина колонок считается один раз на набор данных, а не при каждой подгрузке
+            table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+            table.verticalHeader().setVisible(False)
+
+        self.statusbar.showMessage(f"Администратор: {self.user_info['full_name']}")
+
+        # Поиск при вводе: запрос уходит после паузы в наборе
+        self.farmer_search_timer = QTimer(self)
+        self.farmer_search_timer.setSingleShot(True)
+        self.farmer_search_timer.setInterval(SEARCH_DELAY_MS)
+        self.product_search_timer = QTimer(self)
+        self.product_search_timer.setSingleShot(True)
+        self.product_search_timer.setInterval(SEARCH_DELAY_MS)
+
+        # Статистика запросов и кэша в строке состояния
+        self.metrics_label = QLabel(self)
+        self.statusbar.addPermanentWidget(self.metrics_label)
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(METRICS_INTERVAL_MS)
+        self.metrics_timer.start()
+
+    def connect_signals(self):
+        """Подключение сигналов"""
+        log.debug("Подключение сигналов...")
+
+        # Кнопки отчетов
+        self.btn_regional_prod.clicked.connect(self.show_regional_production)
+        self.btn_farmers_needs.clicked.connect(self.show_farmers_needs)
+        self.btn_product_stats.clicked.connect(self.show_product_stats)
+        self.btn_farmers_profit.clicked.connect(self.show_farmers_profit)
+        self.btn_required_credits.clicked.connect(self.show_required_credits)
+        self.btn_credit_profit_diff.clicked.connect(self.show_credit_profit_diff)
+
+        # Вкладки загружаются при первом показе
+        self.tabWidget.currentChanged.connect(self.load_tab)
+
+        # Поиск
+        self.btn_search_product.clicked.connect(self.search_product)
+        self.search_product_input.textChanged.connect(lambda _: self.product_search_timer.start())
+        self.product_search_timer.timeout.connect(self.search_product_as_you_type)
+        self.btn_farmer_stats.clicked.connect(self.show_farmer_statistics)
+
+        # Фермеры
+        self.btn_add_farmer.clicked.connect(self.add_farmer)
+        self.btn_edit_farmer.clicked.connect(self.edit_farmer)
+        self.btn_delete_farmer.clicked.connect(self.delete_farmer)
+        self.btn_refresh_farmers.clicked.connect(self.refresh_farmers)
+        self.btn_search_farmer.clicked.connect(self.search_farmer)
+        self.search_farmer_input.textChanged.connect(lambda _: self.farmer_search_timer.start())
+        self.farmer_search_timer.timeout.connect(self.search_farmer_as_you_type)
+        self.btn_exit.clicked.connect(self.exit_to_main)
+
+        # Продукция
+        self.btn_add_product.clicked.connect(self.add_product)
+        self.btn_edit_product.clicked.connect(self.edit_product)
+        self.btn_delete_product.clicked.connect(self.delete_product)
+        self.btn_filter_products.clicked.connect(self.filter_products)
+        self.btn_exit_2.clicked.connect(self.exit_to_main)
+
+        # Потребности
+        self.btn_add_need.clicked.connect(self.add_need)
+        self.btn_edit_need.clicked.connect(self.edit_need)
+        self.btn_delete_need.clicked.connect(self.delete_need)
+        self.btn_filter_needs.clicked.connect(self.filter_needs)
+        self.btn_exit_3.clicked.connect(self.exit_to_main)
+
+        # Меню
+        self.action_import_products.triggered.connect(self.import_products)
+        self.action_import_needs.triggered.connect(self.import_needs)
+        self.action_export.triggered.connect(self.export_current_table)
+        self.action_export_metrics.triggered.connect(self.export_metrics)
+        self.metrics_timer.timeout.connect(self.update_metrics)
+        self.action_exit.triggered.connect(self.exit_to_main)
+
+        log.debug("✓ Сигналы подключены")
+
+    def stop_background_tasks(self):
+        """Отмена фоновых запросов при выходе
+
+        Импорт и выгрузка сначала получают флаг отмены: прерванный KILL QUERY запрос
+        иначе выглядит для них как ошибка данных, и работа продолжается.
+        """
+        for cancel_event in self.cancel_events.values():
+            cancel_event.set()
+        self.cancel_events.clear()
+        self.queries.cancel_all()
+
+    def exit_to_main(self):
+        """Выход в главное окно авторизации"""
+        reply = QMessageBox.question(self, "Выход",
+                                     "Вы уверены, что хотите выйти?\nВы вернетесь на экран авторизации.",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.stop_background_tasks()
+            self.metrics_timer.stop()
+            if self.owns_db:
+                self.db.close()
+            log.info("✗ Выход в главное меню")
+
+            # Закрываем окно администратора
+            self.close()
+
+            # Показываем окно авторизации
+            if self.auth_window:
+                self.auth_window.show_auth_window()
+            else:
+                log.warning("⚠️ Окно авторизации не найдено")
+
+    def load_initial_data(self):
+        """Фоновая загрузка списков фермеров и данных открытой вкладки"""
+        log.info("Загрузка начальных данных...")
+        self.load_combo_farmers()
+        self.load_tab(self.tabWidget.currentIndex())
+
+    def load_tab(self, index):
+        """Загрузка данных вкладки при первом показе"""
+        tab = self.tabWidget.widget(index)
+        loaders = {self.tab_overview: self.show_regional_production,  # Отчет по умолчанию
+                   self.tab_farmers: self.load_farmers,
+                   self.tab_products: self.load_products,
+                   self.tab_needs: self.load_needs}
+        if tab in self.loaded_tabs or tab not in loaders:
+            return
+        self.loaded_tabs.add(tab)
+        log.debug("Загрузка вкладки %s", tab.objectName())
+        loaders[tab]()
+
+    def load_farmers(self):
+        """Загрузка списка фермеров"""
+        log.debug("Загрузка фермеров...")
+        # Отображаем в таблице (строки подгружаются страницами при прокрутке)
+        headers = ["ID", "ФИО", "Адрес", "Телефон", "Логин", "Email", "Дата регистрации", "Роль"]
+        self.export_sources['farmers'] = ('get_all_farmers', ())
+        self.load_paged(self.table_farmers, 'farmers', self.db.get_farmers_page,
+                        'farmer_id', headers, "Ошибка загрузки фермеров")
+
+    def refresh_farmers(self):
+        """Обновление списка фермеров из БД (в обход кэша)"""
+        self.db.invalidate('farmers')
+        self.load_farmers()
+
+    def load_products(self):
+        """Загрузка продукции"""
+        log.debug("Загрузка продукции...")
+        # Правильные заголовки для таблицы products
+        headers = ["ID", "Фермер", "Название продукции", "Количество", "Качество",
+                   "Цена за ед.", "Дата производства", "Продано", "Себестоимость"]
+        self.export_sources['products'] = ('get_all_products', ())
+        self.load_paged(self.table_products, 'products', self.db.get_products_page,
+                        'product_id', headers, "Ошибка загрузки продукции")
+
+    def load_needs(self):
+        """Загрузка потребностей"""
+        log.debug("Загрузка потребностей...")
+        # Правильные заголовки для таблицы needs
+        headers = ["ID", "Фермер", "Название потребности", "Тип", "Цена",
+                   "Требуемое количество", "Статус", "Дата покупки", "Примечания"]
+        self.export_sources['needs'] = ('get_all_needs', ())
+        self.load_paged(self.table_needs, 'needs', self.db.get_needs_page,
+                        'need_id', headers, "Ошибка загрузки потребностей")
+
+    def load_paged(self, table, key, fetch_page, key_field, headers, error_text, page_size=500):
+        """Фоновая загрузка первой страницы таблицы, следующие подгружаются при прокрутке"""
+        def on_done(first_page):
+            count = self.display_paged(table, fetch_page, key_field, headers, page_size, first_page)
+            log.info("✓ Отображено %d записей в таблице %s (первая страница)", count, table.objectName())
+
+        def on_error(error):
+            QMessageBox.critical(self, "Ошибка", f"{error_text}: {str(error)}")
+            log.error("✗ %s: %s", error_text, error)
+
+        self.queries.run(key, fetch_page, None, page_size, on_done=on_done, on_error=on_error)
+
+    def load_combo_farmers(self):
+        """Фоновая загрузка фермеров (только ID и ФИО) в комбобоксы"""
+        self.queries.run('combo_farmers', self.db.get_farmer_names,
+                         on_done=self.fill_combo_farmers,
+                         on_error=lambda error: log.error("✗ Ошибка загрузки комбобоксов: %s", error))
+
+    def fill_combo_farmers(self, farmers):
+        """Заполнение комбобоксов: оба используют одну модель списка"""
+        self.farmer_names = farmers
+        model = QStandardItemModel(self)
+        model.appendRow(self.farmer_item("Все фермеры", 0))
+        for farmer in farmers:
+            model.appendRow(self.farmer_item(farmer['full_name'], farmer['farmer_id']))
+
+        self.combo_farmers.setModel(model)
+        self.combo_products_farmer.setModel(model)
+        log.info("✓ Загружено %d фермеров в комбобоксы", len(farmers))
+
+    @staticmethod
+    def farmer_item(name, farmer_id):
+        """Элемент списка фермеров (ID хранится как данные элемента, как в addItem)"""
+        item = QStandardItem(name)
+        item.setData(farmer_id, Qt.UserRole)
+        return item
+
+    def farmer_choices(self):
+        """Фермеры для диалогов: уже загруженный список или легкий запрос ID и ФИО"""
+        if self.farmer_names is not None:
+            return self.farmer_names
+        return self.db.get_farmer_names()
+
+    def apply_role_permissions(self):
+        """Скрываем кнопки управления, если пользователь — не администратор"""
+        is_admin = self.user_info.get('role') == 'Администратор'
+
+        # Список всех кнопок, которые должны быть видны ТОЛЬКО админу
+        management_buttons = [
+            self.btn_add_farmer,
+            self.btn_edit_farmer,
+            self.btn_delete_farmer,
+            self.btn_add_product,
+            self.btn_edit_product,
+            self.btn_delete_product,
+            self.btn_add_need,
+            self.btn_edit_need,
+            self.btn_delete_need,
+        ]
+
+        for btn in management_buttons:
+            btn.setVisible(is_admin)
+
+        self.action_import_products.setVisible(is_admin)
+        self.action_import_needs.setVisible(is_admin)
+
+    def display_in_table(self, table, data, headers=None):
+        """Отображение данных в таблице"""
+        model = table.model()
+        try:
+            count = model.set_rows(data, headers)
+            if count == 0:
+                log.debug("  Таблица пуста, показываем сообщение")
+                return 0
+
+            log.debug("  Отображаем %d записей в таблице", count)
+            table.resizeColumnsToContents()
+            return count
+
+        except Exception as e:
+            log.exception("  Ошибка в display_in_table: %s", e)
+            model.set_message(f"Ошибка: {str(e)}")
+            return 0
+
+    def display_paged(self, table, fetch_page, key_field, headers=None, page_size=500, first_page=None):
+        """Постраничное отображение данных: следующие страницы подгружаются при прокрутке"""
+        model = table.model()
+        try:
+            count = model.set_pager(fetch_page, key_field, headers, page_size, first_page)
+            if count:
+                table.resizeColumnsToContents()
+            return count
+
+        except Exception as e:
+            log.exception("  Ошибка в display_paged: %s", e)
+            model.set_message(f"Ошибка: {str(e)}")
+            return 0
+
+    @staticmethod
+    def selected_value(table, column):
+        """Значение колонки в выделенной строке таблицы (None, если ничего не выбрано)"""
+        indexes = table.selectionModel().selectedIndexes()
+        if not indexes:
+            return None
+        value = table.model().value(indexes[0].row(), column)
+        return None if value is None else str(value)
+
+    # ========== ОТЧЕТЫ ==========
+
+    def run_report(self, title, method, *args):
+        """Фоновое формирование отчета (незавершенный предыдущий отчет отменяется)"""
+        log.info("Формирование отчета: %s...", title)
+        self.statusbar.showMessage(f"{title}: загрузка...")
+        self.export_sources['reports'] = (method.__name__, args)
+        self.queries.run('reports', method, *args,
+                         on_done=lambda data: self.show_report(title, data),
+                         on_error=lambda error: self.report_failed(title, error))
+
+    def show_report(self, title, data):
+        """Отображение готового отчета в таблице отчетов"""
+        log.debug("  Получено %d записей", len(data) if data else 0)
+        if data and log.isEnabledFor(logging.DEBUG):
+            log.debug("  Пример первой записи: %s", data[0])
+
+        count = self.display_in_table(self.table_reports, data)
+        self.statusbar.showMessage(f"{title}: {count} записей")
+        log.info("✓ Отчет '%s': %d записей", title, count)
+
+    def report_failed(self, title, error):
+        """Сообщение об ошибке формирования отчета"""
+        self.statusbar.showMessage(f"{title}: ошибка")
+        QMessageBox.critical(self, "Ошибка", f"Не удалось получить данные: {str(error)}")
+        log.error("✗ Ошибка отчета '%s': %s", title, error)
+
+    def show_regional_production(self):
+        """1. Продукция области"""
+        self.run_report("Продукция области", self.db.get_regional_production)
+
+    def show_farmers_needs(self):
+        """2. Потребности фермеров"""
+        self.run_report("Потребности фермеров", self.db.get_farmers_needs)
+
+    def show_product_stats(self):
+        """3. Производство продукции"""
+        product_name, ok = QInputDialog.getText(self, "Поиск продукции",
+                                                "Введите название продукции:")
+        if ok and product_name:
+            self.run_report(f"Продукция '{product_name}'", self.db.get_product_production, product_name)
+        else:
+            log.debug("✗ Пользователь отменил ввод названия продукции")
+
+    def show_farmers_profit(self):
+        """4. Прибыль фермеров"""
+        self.run_report("Прибыль фермеров", self.db.calculate_farmers_profit)
+
+    def show_required_credits(self):
+        """5. Требуемые кредиты"""
+        self.run_report("Требуемые кредиты", self.db.calculate_required_credits)
+
+    def show_credit_profit_diff(self):
+        """6. Разница кредит/прибыль"""
+        self.run_report("Разница кредит/прибыль", self.db.calculate_credit_profit_difference)
+
+    def search_product(self):
+        """Поиск продукции"""
+        self.product_search_timer.stop()
+        product_name = self.search_product_input.text().strip()
+        if product_name:
+            self.run_report(f"Найдено '{product_name}'", self.db.get_product_production, product_name)
+        else:
+            QMessageBox.warning(self, "Внимание", "Введите название продукции для поиска")
+
+    def search_product_as_you_type(self):
+        """Поиск продукции при вводе (первые SEARCH_LIMIT результатов по релевантности)"""
+        product_name = self.search_product_input.text().strip()
+        if product_name:
+            self.run_report(f"Найдено '{product_name}'", self.db.get_product_production,
+                            product_name, SEARCH_LIMIT)
+
+    def show_farmer_statistics(self):
+        """Статистика по фермеру"""
+        farmer_id = self.combo_farmers.currentData()
+        if farmer_id and farmer_id > 0:
+            farmer_name = self.combo_farmers.currentText()
+            self.run_report(f"Статистика: {farmer_name}", self.db.get_farmer_statistics, farmer_id)
+        else:
+            QMessageBox.warning(self, "Внимание", "Выберите фермера из списка")
+
+    # ========== ИЗМЕНЕНИЕ ДАННЫХ ==========
+
+    def run_write(self, method, *args, success_text, log_text, error_text, reload=()):
+        """Фоновое выполнение изменения данных с последующим обновлением таблиц"""
+        def on_done(result):
+            if result is False:
+                QMessageBox.warning(self, "Ошибка", error_text)
+                return
+            QMessageBox.information(self, "Успех", success_text)
+            log.info("%s", log_text)
+            for load in reload:
+                load()
+
+        def on_error(error):
+            QMessageBox.critical(self, "Ошибка", f"{error_text}: {str(error)}")
+            log.error("✗ %s: %s", error_text, error)
+
+        self.queries.run(None, method, *args, on_done=on_done, on_error=on_error)
+
+    # ========== ФЕРМЕРЫ ==========
+
+    def add_farmer(self):
+        """Добавление фермера"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Добавить фермера")
+        layout = QVBoxLayout()
+
+        form = QFormLayout()
+        full_name_input = QLineEdit()
+        address_input = QLineEdit()
+        phone_input = QLineEdit()
+        login_input = QLineEdit()
+        password_input = QLineEdit()
+        password_input.setEchoMode(QLineEdit.Password)
+
+        form.addRow("ФИО:", full_name_input)
+        form.addRow("Адрес:", address_input)
+        form.addRow("Телефон:", phone_input)
+        form.addRow("Логин:", login_input)
+        form.addRow("Пароль:", password_input)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+        dialog.setLayout(layout)
+
+        if dialog.exec_():
+            # Проверка заполнения полей
+            if not all([full_name_input.text(), address_input.text(),
+                        login_input.text(), password_input.text()]):
+                QMessageBox.warning(self, "Внимание", "Заполните все обязательные поля")
+                return
+
+            # Хешируем пароль
+            password_hash = Database.hash_password(password_input.text())
+
+            self.run_write(self.db.add_farmer, full_name_input.text(), address_input.text(),
+                           phone_input.text(), login_input.text(), password_hash,
+                           success_text="Фермер добавлен",
+                           log_text=f"✓ Добавлен новый фермер: {full_name_input.text()}",
+                           error_text="Ошибка добавления",
+                           reload=(self.load_farmers, self.load_combo_farmers))
+
+    def edit_farmer(self):
+        """Редактирование фермера"""
+        farmer_id = self.selected_value(self.table_farmers, 0)
+        if not farmer_id:
+            QMessageBox.warning(self, "Внимание", "Выберите фермера для редактирования")
+            return
+
+        self.queries.run(None, self.db.get_farmer_by_id, int(farmer_id),
+                         on_done=self.edit_farmer_dialog,
+                         on_error=lambda error: QMessageBox.critical(self, "Ошибка", str(error)))
+
+    def edit_farmer_dialog(self, farmer):
+        """Диалог редактирования загруженного фермера"""
+        if not farmer:
+            QMessageBox.warning(self, "Ошибка", "Фермер не найден")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Редактировать фермера")
+        layout = QVBoxLayout()
+
+        form = QFormLayout()
+        full_name_input = QLineEdit(farmer['full_name'])
+        address_input = QLineEdit(farmer['address'])
+        phone_input = QLineEdit(farmer.get('phone', ''))
+
+        form.addRow("ФИО:", full_name_input)
+        form.addRow("Адрес:", address_input)
+        form.addRow("Телефон:", phone_input)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+        dialog.setLayout(layout)
+
+        if dialog.exec_():
+            self.run_write(self.db.update_farmer, farmer['farmer_id'], full_name_input.text(),
+                           address_input.text(), phone_input.text(), farmer.get('email', ''),
+                           success_text="Данные обновлены",
+                           log_text=f"✓ Обновлен фермер ID: {farmer['farmer_id']}",
+                           error_text="Не удалось обновить данные",
+                           reload=(self.load_farmers, self.load_combo_farmers))
+
+    def delete_farmer(self):
+        """Удаление фермера"""
+        farmer_id = self.selected_value(self.table_farmers, 0)
+        if not farmer_id:
+            QMessageBox.warning(self, "Внимание", "Выберите фермера для удаления")
+            return
+
+        farmer_name = self.selected_value(self.table_farmers, 1)
+
+        reply = QMessageBox.question(self, "Подтверждение",
+                                     f"Удалить фермера '{farmer_name}'?\nВсе связанные данные будут удалены.",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.run_write(self.db.delete_farmer, int(farmer_id),
+                           success_text="Фермер удален",
+                           log_text=f"✓ Удален фермер ID: {farmer_id}",
+                           error_text="Не удалось удалить фермера",
+                           reload=(self.load_farmers, self.load_combo_farmers))
+
+    def search_farmer(self):
+        """Поиск фермера"""
+        self.run_farmer_search()
+
+    def search_farmer_as_you_type(self):
+        """Поиск фермера при вводе (первые SEARCH_LIMIT результатов по релевантности)"""
+        self.run_farmer_search(SEARCH_LIMIT)
+
+    def run_farmer_search(self, limit=None):
+        """Фоновый поиск фермеров по тексту поля поиска"""
+        self.farmer_search_timer.stop()
+        search_term = self.search_farmer_input.text().strip()
+        if search_term:
+            log.debug("Поиск фермера: %s", search_term)
+            self.export_sources['farmers'] = ('search_farmers', (search_term, limit))
+            self.queries.run('farmers', self.db.search_farmers, search_term, limit,
+                             on_done=self.show_found_farmers,
+                             on_error=lambda error: QMessageBox.critical(self, "Ошибка", str(error)))
+        else:
+            self.load_farmers()
+
+    def show_found_farmers(self, data):
+        """Отображение результатов поиска фермеров"""
+        headers = ["ID", "ФИО", "Адрес", "Телефон", "Логин"]
+        self.display_in_table(self.table_farmers, data, headers)
+        self.statusbar.showMessage(f"Найдено фермеров: {len(data)}")
+        log.info("✓ Результаты поиска: %d записей", len(data))
+
+    # ========== ПРОДУКЦИЯ И ПОТРЕБНОСТИ ==========
+
+    @staticmethod
+    def parse_number(text):
+        """Число из поля ввода (пустое поле - 0)"""
+        return float(text) if text else 0
+
+    def add_product(self):
+        """Добавление продукции"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Добавить продукцию")
+        layout = QVBoxLayout()
+
+        form = QFormLayout()
+        farmer_combo = QComboBox()
+        product_name_input = QLineEdit()
+        quantity_input = QLineEdit()
+        quality_input = QLineEdit()
+        unit_price_input = QLineEdit()
+        production_cost_input = QLineEdit()
+
+        # Заполняем комбобокс фермерами
+        farmers = self.farmer_choices()
+        for farmer in farmers:
+            farmer_combo.addItem(farmer['full_name'], farmer['farmer_id'])
+
+        form.addRow("Фермер:", farmer_combo)
+        form.addRow("Название продукции:", product_name_input)
+        form.addRow("Количество:", quantity_input)
+        form.addRow("Качество:", quality_input)
+        form.addRow("Цена за единицу:", unit_price_input)
+        form.addRow("Себестоимость:", production_cost_input)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+        dialog.setLayout(layout)
+
+        if dialog.exec_():
+            farmer_id = farmer_combo.currentData()
+            if not farmer_id:
+                QMessageBox.warning(self, "Внимание", "Выберите фермера")
+                return
+
+            try:
+                values = (self.parse_number(quantity_input.text()),
+                          quality_input.text(),
+                          self.parse_number(unit_price_input.text()),
+                          self.parse_number(production_cost_input.text()))
+            except ValueError as e:
+                QMessageBox.critical(self, "Ошибка", f"Ошибка добавления: {str(e)}")
+                return
+
+            self.run_write(self.db.add_product, farmer_id, product_name_input.text(), *values,
+                           success_text="Продукция добавлена",
+                           log_text=f"✓ Добавлена новая продукция: {product_name_input.text()}",
+                           error_text="Ошибка добавления",
+                           reload=(self.load_products,))
+
+    def edit_product(self):
+        """Редактирование продукции"""
+        product_id = self.selected_value(self.table_products, 0)
+        if not product_id:
+            QMessageBox.warning(self, "Внимание", "Выберите продукцию для редактирования")
+            return
+
+        # Получаем данные о продукции
+        self.queries.run(None, self.db.get_product_by_id, int(product_id),
+                         on_done=self.edit_product_dialog,
+                         on_error=lambda error: QMessageBox.critical(
+                             self, "Ошибка", f"Ошибка редактирования: {str(error)}"))
+
+    def edit_product_dialog(self, product):
+        """Диалог редактирования загруженной продукции"""
+        if not product:
+            QMessageBox.warning(self, "Ошибка", "Продукция не найдена")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Редактировать продукцию")
+        layout = QVBoxLayout()
+
+        form = QFormLayout()
+        product_name_input = QLineEdit(product['product_name'])
+        quantity_input = QLineEdit(str(product['quantity']))
+        quality_input = QLineEdit(product['quality'])
+        unit_price_input = QLineEdit(str(product['unit_price']))
+        production_cost_input = QLineEdit(str(product['production_cost']))
+
+        form.addRow("Название продукции:", product_name_input)
+        form.addRow("Количество:", quantity_input)
+        form.addRow("Качество:", quality_input)
+        form.addRow("Цена за единицу:", unit_price_input)
+        form.addRow("Себестоимость:", production_cost_input)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+        dialog.setLayout(layout)
+
+        if dialog.exec_():
+            try:
+                values = (self.parse_number(quantity_input.text()),
+                          quality_input.text(),
+                          self.parse_number(unit_price_input.text()),
+                          self.parse_number(production_cost_input.text()))
+            except ValueError as e:
+                QMessageBox.critical(self, "Ошибка", f"Ошибка редактирования: {str(e)}")
+                return
+
+            product_id = product['product_id']
+            self.run_write(self.db.update_product, product_id, product_name_input.text(), *values,
+                           success_text="Продукция обновлена",
+                           log_text=f"✓ Обновлена продукция ID: {product_id}",
+                           error_text="Ошибка редактирования",
+                           reload=(self.load_products,))
+
+    def delete_product(self):
+        """Удаление продукции"""
+        product_id = self.selected_value(self.table_products, 0)
+        if not product_id:
+            QMessageBox.warning(self, "Внимание", "Выберите продукцию для удаления")
+            return
+
+        product_name = self.selected_value(self.table_products, 2)
+
+        reply = QMessageBox.question(self, "Подтверждение",
+                                     f"Удалить продукцию '{product_name}'?",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.run_write(self.db.delete_product, int(product_id),
+                           success_text="Продукция удалена",
+                           log_text=f"✓ Удалена продукция ID: {product_id}",
+                           error_text="Ошибка удаления",
+                           reload=(self.load_products,))
+
+    def filter_products(self):
+        """Фильтрация продукции"""
+        farmer_id = self.combo_products_farmer.currentData()
+        if farmer_id:
+            self.export_sources['products'] = ('get_farmer_products', (farmer_id,))
+            self.queries.run('products', self.db.get_farmer_products, farmer_id,
+                             on_done=self.show_filtered_products,
+                             on_error=lambda error: QMessageBox.critical(self, "Ошибка", str(error)))
+        else:
+            self.load_products()
+
+    def show_filtered_products(self, products):
+        """Отображение продукции выбранного фермера"""
+        headers = ["ID", "Название продукции", "Количество", "Качество",
+                   "Цена за ед.", "Дата производства", "Продано", "Себестоимость"]
+        self.display_in_table(self.table_products, products, headers)
+        self.statusbar.showMessage(f"Продукция выбранного фермера: {len(products)} записей")
+
+    def add_need(self):
+        """Добавление потребности"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Добавить потребность")
+        layout = QVBoxLayout()
+
+        form = QFormLayout()
+        farmer_combo = QComboBox()
+        need_name_input = QLineEdit()
+        need_type_combo = QComboBox()
+        price_input = QLineEdit()
+        quantity_input = QLineEdit()
+        status_combo = QComboBox()
+
+        # Заполняем комбобоксы
+        farmers = self.farmer_choices()
+        for farmer in farmers:
+            farmer_combo.addItem(farmer['full_name'], farmer['farmer_id'])
+
+        need_type_combo.addItems(["Товар", "Услуга"])
+        status_combo.addItems(["Требуется", "Закуплено", "В процессе"])
+
+        form.addRow("Фермер:", farmer_combo)
+        form.addRow("Название потребности:", need_name_input)
+        form.addRow("Тип:", need_type_combo)
+        form.addRow("Цена:", price_input)
+        form.addRow("Требуемое количество:", quantity_input)
+        form.addRow("Статус:", status_combo)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+        dialog.setLayout(layout)
+
+        if dialog.exec_():
+            farmer_id = farmer_combo.currentData()
+            if not farmer_id:
+                QMessageBox.warning(self, "Внимание", "Выберите фермера")
+                return
+
+            try:
+                price = self.parse_number(price_input.text())
+                quantity = self.parse_number(quantity_input.text())
+            except ValueError as e:
+                QMessageBox.critical(self, "Ошибка", f"Ошибка добавления: {str(e)}")
+                return
+
+            self.run_write(self.db.add_need, farmer_id, need_name_input.text(),
+                           need_type_combo.currentText(), price, quantity,
+                           status_combo.currentText(),
+                           success_text="Потребность добавлена",
+                           log_text=f"✓ Добавлена новая потребность: {need_name_input.text()}",
+                           error_text="Ошибка добавления",
+                           reload=(self.load_needs,))
+
+    def edit_need(self):
+        """Редактирование потребности"""
+        need_id = self.selected_value(self.table_needs, 0)
+        if not need_id:
+            QMessageBox.warning(self, "Внимание", "Выберите потребность для редактирования")
+            return
+
+        # Получаем данные о потребности
+        self.queries.run(None, self.db.get_need_by_id, int(need_id),
+                         on_done=self.edit_need_dialog,
+                         on_error=lambda error: QMessageBox.critical(
+                             self, "Ошибка", f"Ошибка редактирования: {str(error)}"))
+
+    def edit_need_dialog(self, need):
+        """Диалог редактирования загруженной потребности"""
+        if not need:
+            QMessageBox.warning(self, "Ошибка", "Потребность не найдена")
+            return
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Редактировать потребность")
+        layout = QVBoxLayout()
+
+        form = QFormLayout()
+        need_name_input = QLineEdit(need['need_name'])
+        need_type_combo = QComboBox()
+        price_input = QLineEdit(str(need['price']))
+        quantity_input = QLineEdit(str(need['required_quantity']))
+        status_combo = QComboBox()
+
+        need_type_combo.addItems(["Товар", "Услуга"])
+        status_combo.addItems(["Требуется", "Закуплено", "В процессе"])
+
+        # Устанавливаем текущие значения
+        need_type_combo.setCurrentText(need['need_type'])
+        status_combo.setCurrentText(need['status'])
+
+        form.addRow("Название потребности:", need_name_input)
+        form.addRow("Тип:", need_type_combo)
+        form.addRow("Цена:", price_input)
+        form.addRow("Требуемое количество:", quantity_input)
+        form.addRow("Статус:", status_combo)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(dialog.accept)
+        buttons.rejected.connect(dialog.reject)
+
+        layout.addLayout(form)
+        layout.addWidget(buttons)
+        dialog.setLayout(layout)
+
+        if dialog.exec_():
+            try:
+                price = self.parse_number(price_input.text())
+                quantity = self.parse_number(quantity_input.text())
+            except ValueError as e:
+                QMessageBox.critical(self, "Ошибка", f"Ошибка редактирования: {str(e)}")
+                return
+
+            need_id = need['need_id']
+            self.run_write(self.db.update_need, need_id, need_name_input.text(),
+                           need_type_combo.currentText(), price, quantity,
+                           status_combo.currentText(),
+                           success_text="Потребность обновлена",
+                           log_text=f"✓ Обновлена потребность ID: {need_id}",
+                           error_text="Ошибка редактирования",
+                           reload=(self.load_needs,))
+
+    def delete_need(self):
+        """Удаление потребности"""
+        need_id = self.selected_value(self.table_needs, 0)
+        if not need_id:
+            QMessageBox.warning(self, "Внимание", "Выберите потребность для удаления")
+            return
+
+        need_name = self.selected_value(self.table_needs, 2)
+
+        reply = QMessageBox.question(self, "Подтверждение",
+                                     f"Удалить потребность '{need_name}'?",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.run_write(self.db.delete_need, int(need_id),
+                           success_text="Потребность удалена",
+                           log_text=f"✓ Удалена потребность ID: {need_id}",
+                           error_text="Ошибка удаления",
+                           reload=(self.load_needs,))
+
+    def filter_needs(self):
+        """Фильтрация потребностей"""
+        status = self.combo_need_status.currentText()
+        if status != "Все":
+            self.export_sources['needs'] = ('get_needs_by_status', (status,))
+            self.queries.run('needs', self.db.get_needs_by_status, status,
+                             on_done=lambda needs: self.show_filtered_needs(status, needs),
+                             on_error=lambda error: QMessageBox.critical(self, "Ошибка", str(error)))
+        else:
+            self.load_needs()
+
+    def show_filtered_needs(self, status, needs):
+        """Отображение потребностей с выбранным статусом"""
+        headers = ["ID", "Фермер", "Название потребности", "Тип", "Цена",
+                   "Требуемое количество", "Статус", "Дата покупки", "Примечания"]
+        self.display_in_table(self.table_needs, needs, headers)
+        self.statusbar.showMessage(f"Потребности со статусом '{status}': {len(needs)} записей")
+
+    # ========== ИМПОРТ ==========
+
+    def import_products(self):
+        """Импорт продукции из файла"""
+        self.import_data('products', "продукции", self.load_products)
+
+    def import_needs(self):
+        """Импорт потребностей из файла"""
+        self.import_data('needs', "потребностей", self.load_needs)
+
+    def import_data(self, kind, title, reload):
+        """Фоновый импорт CSV/XLSX с окном прогресса и возможностью отмены"""
+        path, _ = QFileDialog.getOpenFileName(self, f"Импорт {title}", "",
+                                              "Таблицы (*.csv *.xlsx);;Все файлы (*)")
+        if not path:
+            return
+
+        errors_path = os.path.splitext(path)[0] + "_ошибки.csv"
+        cancel_event = threading.Event()
+
+        progress_dialog = QProgressDialog(f"Импорт {title}...", "Отмена", 0, 0, self)
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(0)
+        progress_dialog.canceled.connect(cancel_event.set)
+
+        reporter = ProgressReporter(self)
+        reporter.changed.connect(lambda values: progress_dialog.setLabelText(
+            "Импорт {}...\nОбработано: {}, загружено: {}, ошибок: {}".format(title, *values)))
+
+        def on_done(stats):
+            self.cancel_events.pop('import', None)
+            progress_dialog.close()
+            message = f"Загружено записей: {stats['imported']}\nОшибок: {stats['failed']}"
+            if stats['failed']:
+                message += f"\n\nОшибочные строки: {errors_path}"
+            QMessageBox.information(self, "Импорт завершен", message)
+            log.info("✓ Импорт %s: %s", title, stats)
+            reload()
+
+        def on_error(error):
+            self.cancel_events.pop('import', None)
+            progress_dialog.close()
+            if isinstance(error, importer.ImportCancelled):
+                QMessageBox.information(self, "Импорт прерван",
+                                        f"Загружено записей до отмены: {error.stats['imported']}")
+                reload()
+            else:
+                QMessageBox.critical(self, "Ошибка", f"Ошибка импорта: {str(error)}")
+                log.error("✗ Ошибка импорта %s: %s", title, error)
+
+        self.cancel_events['import'] = cancel_event
+        self.queries.run('import', importer.import_file, self.db, kind, path, errors_path,
+                         importer.BATCH_SIZE, reporter, cancel_event,
+                         on_done=on_done, on_error=on_error)
+        progress_dialog.show()
+
+    # ========== ЭКСПОРТ ==========
+
+    def export_current_table(self):
+        """Выгрузка данных текущей вкладки (все строки, а не только подгруженные) в CSV/XLSX"""
+        tabs = {self.tab_overview: 'reports', self.tab_farmers: 'farmers',
+                self.tab_products: 'products', self.tab_needs: 'needs'}
+        source = self.export_sources.get(tabs.get(self.tabWidget.currentWidget()))
+        if not source:
+            QMessageBox.warning(self, "Внимание", "Нет данных для выгрузки")
+            return
+
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт", "",
+                                              "Excel (*.xlsx);;CSV (*.csv)")
+        if not path:
+            return
+
+        method_name, args = source
+        cancel_event = threading.Event()
+
+        progress_dialog = QProgressDialog("Экспорт...", "Отмена", 0, 0, self)
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(0)
+        progress_dialog.canceled.connect(cancel_event.set)
+
+        reporter = ProgressReporter(self)
+        reporter.changed.connect(lambda values: progress_dialog.setLabelText(
+            "Экспорт...\nЗаписано строк: {}".format(*values)))
+
+        key = f"export:{path}"
+
+        def on_done(rows):
+            self.cancel_events.pop(key, None)
+            progress_dialog.close()
+            self.statusbar.showMessage(f"Выгружено {rows} строк: {path}")
+            log.info("✓ Экспорт %s: %d строк в %s", method_name, rows, path)
+
+        def on_error(error):
+            self.cancel_events.pop(key, None)
+            progress_dialog.close()
+            if isinstance(error, exporter.ExportCancelled):
+                self.statusbar.showMessage("Экспорт отменен")
+            else:
+                QMessageBox.critical(self, "Ошибка", f"Ошибка экспорта: {str(error)}")
+                log.error("✗ Ошибка экспорта %s: %s", method_name, error)
+
+        self.cancel_events[key] = cancel_event
+        self.queries.run(key, exporter.export_report, self.db, method_name, args, path,
+                         None, exporter.BATCH_SIZE, reporter, cancel_event,
+                         on_done=on_done, on_error=on_error)
+        progress_dialog.show()
+
+    # ========== СТАТИСТИКА ЗАПРОСОВ ==========
+
+    def update_metrics(self):
+        """Обновление статистики запросов и кэша в строке состояния"""
+        stats = self.db.query_stats()
+        cache = self.db.cache_stats()
+        self.metrics_label.setText(
+            f"Запросов: {stats['queries']} ({stats['total_ms'] / 1000:.1f} с) | "
+            f"медленных: {stats['slow']} | кэш: {cache['hit_rate']:.0%}")
+
+    def export_metrics(self):
+        """Выгрузка статистики запросов, медленных запросов с EXPLAIN и кэша в JSON"""
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт статистики запросов",
+                                              "статистика_запросов.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.db.export_stats(path)
+            self.statusbar.showMessage(f"Статистика запросов сохранена: {path}")
+            log.info("✓ Статистика запросов сохранена: %s", path)
+        except Exception as e:
+            QMessageBox.critical(self, "Ошибка", f"Не удалось сохранить статистику: {str(e)}")
+            log.error("✗ Ошибка сохранения статистики: %s", e)
+
+    # ========== ДОПОЛНИТЕЛЬНЫЕ МЕТОДЫ ==========
+
+    def closeEvent(self, event):
+        """Обработка закрытия окна"""
+        reply = QMessageBox.question(self, "Выход",
+                                     "Вы уверены, что хотите выйти?",
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.stop_background_tasks()
+            self.metrics_timer.stop()
+            if self.owns_db:
+                self.db.close()
+            log.info("✗ Окно администратора закрыто")
+
+            # Показываем окно авторизации при закрытии
+            if self.auth_window:
+                self.auth_window.show_auth_window()
+
+            event.accept()
+        else:
+            event.ignore()
+
+
+# Тестовый запуск (если запускается напрямую, а не из main.py)
+if __name__ == "__main__":
+    logging.basicConfig(level=os.environ.get('FARMER_LOG_LEVEL', 'INFO'),
+                        format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    app = QApplication(sys.argv)
+
+    # Тестовые данные пользователя (для тестирования без авторизации)
+    test_user = {
+        'farmer_id': 1,
+        'full_name': 'Администратор системы (тест)',
+        'role': 'Администратор'
+    }
+
+
+    # Для теста создаем фиктивное окно авторизации
+    class FakeAuthWindow:
+        def show_auth_window(self):
+            print("Тест: Показано окно авторизации")
+
+
+    window = AdminWindow(test_user, FakeAuthWindow())
+    window.show()
+    sys.exit(app.exec_())
\ No newline at end of file
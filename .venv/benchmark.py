@@ -0,0 +1,339 @@
+# benchmark.py
+"""Замеры производительности отчетов, списков и отображения таблиц
+
+Каждый метод Database выполняется --repeat раз с очищенным кэшем; для него
+сохраняются перцентили времени, число строк, строк/с, пиковый RSS процесса и его
+рост относительно начала замера.
+Результаты пишутся в JSON и сравниваются с сохраненной базовой линией:
+    python generate_data.py --farmers 100000 --products 5000000 --needs 5000000 --reset
+    python benchmark.py --save-baseline          # сохранить базовую линию
+    python benchmark.py                          # сравнить, код 1 при регрессии
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import resource
+import sys
+import threading
+from datetime import datetime
+from time import perf_counter, sleep
+
+# Отображение таблиц проверяется без экрана
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from config import Database
+
+BASELINE_PATH = 'benchmark_baseline.json'
+RESULTS_PATH = 'benchmark_results.json'
+
+# Допустимое ухудшение относительно базовой линии
+TOLERANCE = 0.25
+# Изменения медианы меньше этого порога (мс) считаются шумом
+MIN_REGRESSION_MS = 5.0
+# Рост памяти меньше этого порога (КБ) считается шумом
+MIN_REGRESSION_KB = 1024
+
+
+# ========== ИЗМЕРЕНИЯ ==========
+
+def percentile(values, p):
+    """Перцентиль по методу ближайшего ранга"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+
+def current_rss_kb():
+    """Текущий RSS процесса в КБ (на системах без /proc - максимальный за все время)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * (os.sysconf('SC_PAGE_SIZE') // 1024)
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class RssSampler:
+    """Пиковый RSS за время выполнения блока (опрос в фоновом потоке)
+
+    start_kb - RSS в начале блока; growth_kb - насколько пик превысил его, то есть
+    память, занятая самим замером, без данных, оставшихся от предыдущих замеров.
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.start_kb = 0
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def growth_kb(self):
+        return max(0, self.peak_kb - self.start_kb)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, current_rss_kb())
+            sleep(self.interval)
+
+    def __enter__(self):
+        gc.collect()
+        self.start_kb = self.peak_kb = current_rss_kb()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_kb = max(self.peak_kb, current_rss_kb())
+
+
+def measure(call, repeat, warmup, before=None):
+    """Многократный вызов call() -> число строк; возвращает сводку замеров
+
+    call() не должен сохранять результат: память замера считается от RSS в его начале.
+    """
+    timings = []
+    rows = 0
+    with RssSampler() as rss:
+        for _ in range(warmup):
+            if before:
+                before()
+            call()
+        for _ in range(repeat):
+            if before:
+                before()
+            started = perf_counter()
+            rows = call()
+            timings.append((perf_counter() - started) * 1000)
+
+    p50 = percentile(timings, 50)
+    return {
+        'rows': rows,
+        'repeat': repeat,
+        'min_ms': round(min(timings), 3),
+        'p50_ms': round(p50, 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'max_ms': round(max(timings), 3),
+        'rows_per_sec': round(rows / (p50 / 1000), 1) if p50 > 0 else None,
+        'start_rss_kb': rss.start_kb,
+        'peak_rss_kb': rss.peak_kb,
+        'rss_growth_kb': rss.growth_kb,
+    }
+
+
+# ========== НАБОР ЗАМЕРОВ ==========
+
+def sample_arguments(db):
+    """Аргументы для методов с параметрами: фермер с наибольшим числом продукции"""
+    db.clear_unread_results()
+    db.cur.execute("""
+        SELECT farmer_id FROM farmer_financial_summary
+        ORDER BY products_count DESC
+        LIMIT 1
+    """)
+    row = db.cur.fetchone()
+    return {
+        'farmer_id': row['farmer_id'] if row else 1,
+        'product_name': 'Пшеница',
+        'search_term': 'Иван',
+        'status': 'Требуется',
+    }
+
+
+def database_cases(db, arguments):
+    """Методы Database: имя замера -> (метод, аргументы)"""
+    farmer_id = arguments['farmer_id']
+    return {
+        # Отчеты
+        'get_regional_production': (db.get_regional_production, ()),
+        'get_farmers_needs': (db.get_farmers_needs, ()),
+        'get_product_production': (db.get_product_production, (arguments['product_name'],)),
+        'calculate_farmers_profit': (db.calculate_farmers_profit, ()),
+        'calculate_required_credits': (db.calculate_required_credits, ()),
+        'calculate_credit_profit_difference': (db.calculate_credit_profit_difference, ()),
+        'get_farmer_statistics': (db.get_farmer_statistics, (farmer_id,)),
+        # Списки и поиск
+        'get_all_farmers': (db.get_all_farmers, ()),
+        'search_farmers': (db.search_farmers, (arguments['search_term'],)),
+        'get_farmer_products': (db.get_farmer_products, (farmer_id,)),
+        'get_farmer_needs': (db.get_farmer_needs, (farmer_id,)),
+        'get_all_products': (db.get_all_products, ()),
+        'get_all_needs': (db.get_all_needs, ()),
+        'get_needs_by_status': (db.get_needs_by_status, (arguments['status'],)),
+        'get_farmers_page': (db.get_farmers_page, ()),
+        'get_products_page': (db.get_products_page, ()),
+        'get_needs_page': (db.get_needs_page, ()),
+    }
+
+
+def table_sizes(db):
+    """Число строк в таблицах (для сравнения результатов на разных наборах данных)"""
+    sizes = {}
+    for table in ('farmers', 'products', 'needs'):
+        db.clear_unread_results()
+        db.cur.execute(f"SELECT COUNT(*) AS total FROM {table}")
+        sizes[table] = db.cur.fetchone()['total']
+    return sizes
+
+
+def run_benchmarks(db, repeat=5, warmup=1, only=None, display=True):
+    """Выполнение всех замеров; only - регулярное выражение для отбора по имени
+
+    Отображение каждого результата замеряется сразу после его запроса, после чего
+    данные освобождаются: в памяти одновременно находится результат только одного метода.
+    """
+    results = {}
+    pattern = re.compile(only) if only else None
+    display_table = None
+
+    for name, (method, args) in database_cases(db, sample_arguments(db)).items():
+        case = f"display_in_table:{name}"
+        run_query = not pattern or pattern.search(name)
+        run_display = display and (not pattern or pattern.search(case))
+
+        if run_query:
+            print(f"  {name}...", end='', flush=True)
+            results[name] = measure(lambda method=method, args=args: len(method(*args)),
+                                    repeat, warmup, before=db.cache.clear)
+            print(f" p50 {results[name]['p50_ms']:.1f} мс, строк: {results[name]['rows']}")
+
+        if run_display:
+            if display_table is None:
+                display_table = DisplayTable()
+            data = method(*args)
+            print(f"  {case}...", end='', flush=True)
+            results[case] = display_table.measure(data, repeat, warmup)
+            del data
+            print(f" p50 {results[case]['p50_ms']:.1f} мс")
+
+    if display_table is not None:
+        display_table.close()
+    return results
+
+
+class DisplayTable:
+    """Таблица для замеров AdminWindow.display_in_table на платформе offscreen"""
+
+    def __init__(self):
+        from PyQt5.QtWidgets import QApplication, QTableView
+        from table_model import PagedTableModel
+
+        self.app = QApplication.instance() or QApplication(sys.argv)
+        self.table = QTableView()
+        self.table.setModel(PagedTableModel(self.table))
+        self.table.resize(1200, 800)
+        self.table.show()
+
+    def measure(self, data, repeat, warmup):
+        from admin_window import AdminWindow
+
+        def call():
+            # display_in_table не зависит от состояния окна, поэтому окно не создается
+            count = AdminWindow.display_in_table(None, self.table, data)
+            self.app.processEvents()
+            return count
+
+        result = measure(call, repeat, warmup)
+        # Строки модели освобождаются до следующего замера
+        self.table.model().set_rows([])
+        return result
+
+    def close(self):
+        self.table.close()
+
+
+# ========== БАЗОВАЯ ЛИНИЯ ==========
+
+def compare(results, baseline, tolerance=TOLERANCE, min_ms=MIN_REGRESSION_MS,
+            min_kb=MIN_REGRESSION_KB):
+    """Список регрессий относительно базовой линии"""
+    regressions = []
+    for name, base in baseline.get('results', {}).items():
+        current = results.get(name)
+        if current is None:
+            continue
+        limit = base['p50_ms'] * (1 + tolerance)
+        if current['p50_ms'] > limit and current['p50_ms'] - base['p50_ms'] > min_ms:
+            regressions.append(f"{name}: p50 {current['p50_ms']:.1f} мс "
+                               f"(базовая линия {base['p50_ms']:.1f} мс)")
+        growth, base_growth = current['rss_growth_kb'], base.get('rss_growth_kb')
+        if base_growth is not None and growth > base_growth * (1 + tolerance) \
+                and growth - base_growth > min_kb:
+            regressions.append(f"{name}: рост RSS {growth} КБ "
+                               f"(базовая линия {base_growth} КБ)")
+    return regressions
+
+
+def write_json(path, report):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности фермерской БД")
+    parser.add_argument('--repeat', type=int, default=5, help="повторов каждого замера")
+    parser.add_argument('--warmup', type=int, default=1, help="прогревочных запусков")
+    parser.add_argument('--only', help="регулярное выражение для отбора замеров")
+    parser.add_argument('--no-display', action='store_true', help="без замеров display_in_table")
+    parser.add_argument('--output', default=RESULTS_PATH, help="файл JSON с результатами")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="файл базовой линии")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="сохранить результаты как базовую линию")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="допустимое ухудшение (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    db = Database()
+    try:
+        sizes = table_sizes(db)
+        print(f"Данные: {sizes}")
+        results = run_benchmarks(db, args.repeat, args.warmup, args.only, not args.no_display)
+    except Exception as e:
+        print(f"\n✗ Ошибка замеров: {e}")
+        return 2
+    finally:
+        db.close()
+
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'tables': sizes,
+        'repeat': args.repeat,
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'results': results,
+    }
+    write_json(args.output, report)
+    print(f"✓ Результаты сохранены: {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, report)
+        print(f"✓ Базовая линия сохранена: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Базовая линия {args.baseline} не найдена, сравнение пропущено")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('tables') != sizes:
+        print(f"⚠ Базовая линия снята на других данных: {baseline.get('tables')}")
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("✗ Обнаружены регрессии:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("✓ Регрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,999 @@
+# config.py
+from concurrent.futures import ThreadPoolExecutor
+from mysql.connector import connect, Error
+from mysql.connector.pooling import MySQLConnectionPool
+from query_cache import QueryCache, cached
+from query_stats import QueryStats, InstrumentedCursor, SLOW_QUERY_MS
+import hashlib
+import re
+import threading
+
+DB_CONFIG = {
+    'user': "root",
+    'host': "localhost",
+    'database': "farmer_db",
+    'password': "root",
+    'ssl_disabled': True
+}
+
+# Размер пула соединений для фоновых запросов (и число рабочих потоков)
+POOL_SIZE = 4
+
+# Длина n-граммы полнотекстовых индексов (переменная сервера ngram_token_size)
+NGRAM_TOKEN_SIZE = 2
+
+
+# ========== SQL ОТЧЕТОВ И СПИСКОВ ==========
+# Используются методами Database и потоковой выгрузкой (exporter.py)
+
+REGIONAL_PRODUCTION_SQL = """
+    SELECT 
+        p.product_id,
+        f.full_name as farmer_name,
+        p.product_name,
+        p.quantity,
+        p.quality,
+        p.unit_price as price,
+        p.production_date,
+        p.sold_quantity,
+        p.production_cost,
+        (p.quantity * p.unit_price) as total_value
+    FROM products p
+    JOIN farmers f ON p.farmer_id = f.farmer_id
+    WHERE f.role != 'Администратор'
+    ORDER BY p.production_date DESC
+"""
+
+
+FARMERS_NEEDS_SQL = """
+    SELECT 
+        n.need_id,
+        f.full_name as farmer_name,
+        n.need_name,
+        n.need_type as type,
+        n.price,
+        n.required_quantity,
+        n.status,
+        n.purchase_date,
+        n.notes
+    FROM needs n
+    JOIN farmers f ON n.farmer_id = f.farmer_id
+    WHERE f.role != 'Администратор'
+    ORDER BY n.need_id DESC
+"""
+
+
+FARMERS_PROFIT_SQL = """
+    SELECT 
+        f.full_name as farmer_name,
+        p.product_name,
+        p.quantity,
+        p.unit_price as price_per_unit,
+        p.production_cost as cost_per_unit,
+        (p.quantity * p.unit_price) as total_revenue,
+        (p.quantity * p.production_cost) as total_cost,
+        (p.quantity * (p.unit_price - p.production_cost)) as profit
+    FROM products p
+    JOIN farmers f ON p.farmer_id = f.farmer_id
+    WHERE f.role != 'Администратор'
+    ORDER BY profit DESC
+"""
+
+
+REQUIRED_CREDITS_SQL = """
+    SELECT 
+        f.full_name as farmer_name,
+        ROUND(s.open_credit, 2) as total_credit_needed,
+        s.open_needs_count as needs_count,
+        (SELECT GROUP_CONCAT(n.need_name SEPARATOR ', ')
+         FROM needs n
+         WHERE n.farmer_id = s.farmer_id
+         AND n.status IN ('Требуется', 'В процессе')) as needs_list
+    FROM farmer_financial_summary s
+    JOIN farmers f ON s.farmer_id = f.farmer_id
+    WHERE f.role != 'Администратор' 
+    AND s.open_needs_count > 0
+    ORDER BY s.open_credit DESC
+"""
+
+
+CREDIT_PROFIT_DIFFERENCE_SQL = """
+    SELECT 
+        f.full_name as farmer_name,
+        ROUND(s.total_profit, 2) as total_profit,
+        ROUND(s.open_credit, 2) as total_credit_needed,
+        ROUND(s.total_profit - s.open_credit, 2) as difference,
+        CASE
+            WHEN s.total_profit > s.open_credit THEN 'Прибыль > Кредит'
+            WHEN s.total_profit < s.open_credit THEN 'Кредит > Прибыль'
+            ELSE 'Равны'
+        END as status
+    FROM farmer_financial_summary s
+    JOIN farmers f ON s.farmer_id = f.farmer_id
+    WHERE f.role != 'Администратор'
+    AND s.products_count > 0
+    ORDER BY s.farmer_id
+"""
+
+
+ALL_FARMERS_SQL = """
+    SELECT farmer_id, full_name, address, phone, login, email, 
+           created_at as registration_date, role
+    FROM farmers 
+    WHERE role != 'Администратор'
+    ORDER BY farmer_id
+"""
+
+
+FARMER_PRODUCTS_SQL = "SELECT * FROM products WHERE farmer_id = %s"
+
+FARMER_NEEDS_SQL = "SELECT * FROM needs WHERE farmer_id = %s"
+
+ALL_PRODUCTS_SQL = """
+    SELECT p.*, f.full_name 
+    FROM products p 
+    LEFT JOIN farmers f ON p.farmer_id = f.farmer_id
+    ORDER BY p.product_id DESC
+"""
+
+
+ALL_NEEDS_SQL = """
+    SELECT 
+        n.need_id,
+        n.farmer_id,
+        n.need_name,
+        n.need_type as type,
+        n.price,
+        n.required_quantity as quantity,
+        n.status,
+        n.purchase_date,
+        n.notes,
+        f.full_name 
+    FROM needs n 
+    LEFT JOIN farmers f ON n.farmer_id = f.farmer_id
+    ORDER BY n.need_id DESC
+"""
+
+
+NEEDS_BY_STATUS_SQL = """
+    SELECT 
+        n.need_id,
+        n.farmer_id,
+        n.need_name,
+        n.need_type as type,
+        n.price,
+        n.required_quantity as quantity,
+        n.status,
+        n.purchase_date,
+        n.notes,
+        f.full_name 
+    FROM needs n 
+    LEFT JOIN farmers f ON n.farmer_id = f.farmer_id
+    WHERE n.status = %s
+    ORDER BY n.need_id DESC
+"""
+
+
+# Методы, результат которых можно выгрузить потоково: имя -> SQL (параметры - аргументы метода)
+STREAMABLE_QUERIES = {
+    'get_regional_production': REGIONAL_PRODUCTION_SQL,
+    'get_farmers_needs': FARMERS_NEEDS_SQL,
+    'calculate_farmers_profit': FARMERS_PROFIT_SQL,
+    'calculate_required_credits': REQUIRED_CREDITS_SQL,
+    'calculate_credit_profit_difference': CREDIT_PROFIT_DIFFERENCE_SQL,
+    'get_all_farmers': ALL_FARMERS_SQL,
+    'get_farmer_products': FARMER_PRODUCTS_SQL,
+    'get_farmer_needs': FARMER_NEEDS_SQL,
+    'get_all_products': ALL_PRODUCTS_SQL,
+    'get_all_needs': ALL_NEEDS_SQL,
+    'get_needs_by_status': NEEDS_BY_STATUS_SQL,
+}
+
+
+class Database:
+    """Класс для работы с базой данных фермерской информационной системы"""
+
+    def __init__(self, pool_size=POOL_SIZE, slow_query_ms=SLOW_QUERY_MS):
+        self.pool_size = pool_size
+        self._pool = None
+        self._executor = None
+        self._pool_lock = threading.Lock()
+        # Отдельная блокировка: создание пула соединений не задерживает submit в GUI-потоке
+        self._executor_lock = threading.Lock()
+        # Соединение и курсор рабочего потока (в GUI-потоке используется основное соединение)
+        self._local = threading.local()
+        # Кэш результатов отчетов и списков (сбрасывается при изменении таблиц)
+        self.cache = QueryCache()
+        # Время, строки и объем каждого запроса; медленные запросы пишутся в журнал с EXPLAIN
+        self.stats = QueryStats(slow_query_ms)
+        self.connect_to_database()
+
+    def connect_to_database(self):
+        """Установка соединения с базой данных MySQL"""
+        try:
+            # Основное соединение только читает (изменения идут через пул) и работает в режиме
+            # autocommit: иначе первое чтение открывает транзакцию REPEATABLE READ, и все
+            # следующие чтения видят ее снимок, а не изменения, сделанные после него
+            self._con = connect(**DB_CONFIG, autocommit=True)
+            self._cur = self.instrument(self._con.cursor(dictionary=True), self._con)
+        except Error as e:
+            raise Exception(f"Ошибка подключения к БД: {e}")
+
+    @property
+    def con(self):
+        """Соединение текущего потока"""
+        con = getattr(self._local, 'con', None)
+        return con if con is not None else self._con
+
+    @property
+    def cur(self):
+        """Курсор текущего потока"""
+        cur = getattr(self._local, 'cur', None)
+        return cur if cur is not None else self._cur
+
+    def close(self):
+        """Закрытие соединения с базой данных"""
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._con and self._con.is_connected():
+            self._cur.close()
+            self._con.close()
+
+    # ========== ФОНОВОЕ ВЫПОЛНЕНИЕ ==========
+
+    def _get_executor(self):
+        """Пул потоков создается при первом фоновом запросе (без подключений, быстро)"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.pool_size,
+                                                    thread_name_prefix="db")
+            return self._executor
+
+    def _get_pool(self):
+        """Пул соединений создается в рабочем потоке: pool_size подключений не блокируют GUI"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = MySQLConnectionPool(pool_name=f"farmer_pool_{id(self)}",
+                                                 pool_size=self.pool_size, **DB_CONFIG)
+            return self._pool
+
+    def submit(self, method, *args, **kwargs):
+        """Асинхронный вызов метода в фоновом потоке, возвращает concurrent.futures.Future
+
+        method - метод Database (или его имя) либо любая функция, работающая через db.cur.
+        Число одновременно выполняемых запросов ограничено размером пула соединений.
+        """
+        if isinstance(method, str):
+            method = getattr(self, method)
+        # connection_id меняется и соединение возвращается в пул только под ticket['lock']
+        ticket = {'connection_id': None, 'lock': threading.Lock()}
+        future = self._get_executor().submit(self._run_pooled, method, args, kwargs, ticket)
+        future.db_ticket = ticket
+        return future
+
+    def warm_up(self):
+        """Создание пула соединений в фоне заранее (например, сразу после входа)"""
+        return self._get_executor().submit(self._get_pool)
+
+    def cancel(self, future):
+        """Отмена фонового запроса: ожидающий снимается с очереди, выполняемый прерывается KILL QUERY"""
+        if future.cancel():
+            return True
+        ticket = getattr(future, 'db_ticket', None)
+        if ticket and ticket['connection_id'] is not None and not future.done():
+            threading.Thread(target=self._kill_query, args=(ticket,), daemon=True).start()
+        return False
+
+    @staticmethod
+    def _kill_query(ticket):
+        """Прерывание запроса на отдельном соединении
+
+        ID соединения перечитывается под блокировкой задачи: пока она удерживается,
+        _run_pooled не может вернуть соединение в пул, и KILL не попадет в чужой запрос.
+        """
+        try:
+            con = connect(**DB_CONFIG)
+            try:
+                with ticket['lock']:
+                    connection_id = ticket['connection_id']
+                    if connection_id is not None:
+                        cur = con.cursor()
+                        cur.execute("KILL QUERY %s", (connection_id,))
+                        cur.close()
+            finally:
+                con.close()
+        except Error:
+            pass
+
+    def _run_pooled(self, method, args, kwargs, ticket):
+        """Выполнение метода на соединении из пула, привязанном к текущему потоку"""
+        con = self._get_pool().get_connection()
+        cur = self.instrument(con.cursor(dictionary=True), con)
+        self._local.con, self._local.cur = con, cur
+        with ticket['lock']:
+            ticket['connection_id'] = con.connection_id
+        try:
+            return method(*args, **kwargs)
+        finally:
+            self._local.con = self._local.cur = None
+            with ticket['lock']:
+                ticket['connection_id'] = None
+                try:
+                    cur.close()
+                except Error:
+                    pass
+                try:
+                    con.close()  # Возврат соединения в пул
+                except Error:
+                    pass
+
+    @staticmethod
+    def hash_password(password):
+        """Хеширование пароля с использованием SHA-256"""
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def instrument(self, cursor, connection=None):
+        """Курсор с учетом запросов в статистике self.stats"""
+        return InstrumentedCursor(cursor, connection if connection is not None else self.con,
+                                  self.stats)
+
+    def query_stats(self):
+        """Итоги по выполненным запросам (число, время, строки, медленные)"""
+        return self.stats.summary()
+
+    def export_stats(self, path):
+        """Выгрузка статистики запросов и кэша в JSON"""
+        self.stats.export_json(path, cache=self.cache_stats())
+
+    def invalidate(self, *tables):
+        """Сброс кэшированных результатов, зависящих от измененных таблиц"""
+        self.cache.invalidate(*tables)
+
+    def can_cache(self):
+        """Можно ли кэшировать следующее чтение
+
+        Внутри уже открытой транзакции чтение видит ее снимок REPEATABLE READ, который мог
+        устареть: такой результат, сохраненный под текущим поколением, показывался бы и
+        после правильной перезагрузки.
+        """
+        try:
+            return not self.con.in_transaction
+        except Error:
+            return False
+
+    def cache_stats(self):
+        """Статистика кэша запросов (попадания, промахи, размер)"""
+        return self.cache.stats()
+
+    @staticmethod
+    def fulltext_query(search_term):
+        """Запрос для MATCH ... AGAINST в BOOLEAN MODE: каждое слово ищется как подстрока
+
+        Возвращает None, если все слова короче n-граммы и индекс использовать нельзя.
+        """
+        words = re.sub(r'[+\-<>()~*"@]', ' ', search_term).split()
+        words = [word for word in words if len(word) >= NGRAM_TOKEN_SIZE]
+        if not words:
+            return None
+        return " ".join(f'+"{word}"' for word in words)
+
+    @staticmethod
+    def like_prefix(search_term):
+        """Шаблон LIKE для поиска по началу строки (символы % и _ ищутся буквально)"""
+        return re.sub(r'([\\%_])', r'\\\1', search_term.strip()) + '%'
+
+    def begin(self):
+        """Начало транзакции из нескольких изменений (основное соединение в режиме autocommit)"""
+        if not self.con.in_transaction:
+            self.con.start_transaction()
+
+    def clear_unread_results(self):
+        """Очистка непрочитанных результатов запроса (для предотвращения ошибок)"""
+        try:
+            while self.cur.nextset():
+                pass
+        except:
+            pass
+
+    # ========== ОТЧЕТЫ ==========
+
+    @cached('farmers', 'products')
+    def get_regional_production(self):
+        """1. Продукция, производимая фермерами области"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(REGIONAL_PRODUCTION_SQL)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('farmers', 'needs')
+    def get_farmers_needs(self):
+        """2. Потребности фермеров для производства"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(FARMERS_NEEDS_SQL)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('farmers', 'products')
+    def get_product_production(self, product_name, limit=None):
+        """3. Количество заданной продукции, производимой фермерами (по релевантности)"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(*self.product_production_query(product_name, limit))
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @classmethod
+    def product_production_query(cls, product_name, limit=None):
+        """SQL и параметры отчета 3"""
+        query = cls.fulltext_query(product_name)
+        if query is not None:
+            condition = "MATCH(p.product_name) AGAINST (%s IN BOOLEAN MODE)"
+            order = "MATCH(p.product_name) AGAINST (%s IN BOOLEAN MODE) DESC, p.quantity DESC"
+            params = [query, query]
+        else:
+            # Слишком короткий запрос - поиск по началу названия (индекс idx_product_name)
+            condition = "p.product_name LIKE %s"
+            order = "p.quantity DESC"
+            params = [cls.like_prefix(product_name)]
+
+        limit_clause = "LIMIT %s" if limit else ""
+        if limit:
+            params.append(limit)
+        return f"""
+            SELECT 
+                p.product_id,
+                f.full_name as farmer_name,
+                p.product_name,
+                p.quantity,
+                p.quality,
+                p.unit_price as price,
+                p.production_date,
+                (p.quantity * p.unit_price) as total_value
+            FROM products p
+            JOIN farmers f ON p.farmer_id = f.farmer_id
+            WHERE {condition}
+            AND f.role != 'Администратор'
+            ORDER BY {order}
+            {limit_clause}
+        """, params
+
+    @cached('farmers', 'products')
+    def calculate_farmers_profit(self):
+        """4. Прибыль фермеров по каждому виду продукции"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(FARMERS_PROFIT_SQL)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('farmers', 'needs')
+    def calculate_required_credits(self):
+        """5. Требуемый кредит для каждого фермера"""
+        try:
+            self.clear_unread_results()
+            # Суммы берутся из сводной таблицы, список потребностей - по индексу idx_farmer_need
+            self.cur.execute(REQUIRED_CREDITS_SQL)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('farmers', 'products', 'needs')
+    def calculate_credit_profit_difference(self):
+        """6. Разница между кредитом и полученной прибылью"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(CREDIT_PROFIT_DIFFERENCE_SQL)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('farmers', 'products', 'needs')
+    def get_farmer_statistics(self, farmer_id):
+        """7. Статистика по конкретному фермеру"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("""
+                SELECT f.full_name, f.address, s.*
+                FROM farmers f
+                LEFT JOIN farmer_financial_summary s ON s.farmer_id = f.farmer_id
+                WHERE f.farmer_id = %s
+            """, (farmer_id,))
+            farmer = self.cur.fetchone()
+
+            self.clear_unread_results()
+            self.cur.execute("""
+                SELECT 
+                    product_name,
+                    SUM(quantity) as total_quantity,
+                    AVG(unit_price) as avg_price,
+                    SUM(quantity * unit_price) as total_value
+                FROM products 
+                WHERE farmer_id = %s
+                GROUP BY product_name
+            """, (farmer_id,))
+            products_stats = self.cur.fetchall()
+
+            summary = farmer if farmer and farmer['farmer_id'] is not None else {}
+            result = [{
+                'farmer_id': farmer_id,
+                'full_name': farmer['full_name'] if farmer else 'Не найден',
+                'address': farmer['address'] if farmer else '',
+                'total_products': len(products_stats),
+                'total_needs': summary.get('needs_count', 0),
+                'products_value': round(summary.get('products_value', 0), 2),
+                'needs_cost': round(summary.get('needs_cost', 0), 2)
+            }]
+
+            for product in products_stats:
+                result.append({
+                    'type': 'Продукция',
+                    'название': product['product_name'],
+                    'общее_количество': product['total_quantity'],
+                    'средняя_цена': product['avg_price'],
+                    'общая_стоимость': product['total_value']
+                })
+
+            for status, prefix in (('Требуется', 'needs_required'),
+                                   ('Закуплено', 'needs_purchased'),
+                                   ('В процессе', 'needs_in_progress')):
+                if summary.get(f'{prefix}_count'):
+                    result.append({
+                        'type': 'Потребность',
+                        'статус': status,
+                        'количество': summary[f'{prefix}_count'],
+                        'общая_стоимость': round(summary[f'{prefix}_cost'], 2)
+                    })
+            return result
+        except Error:
+            return []
+
+    def rebuild_financial_summary(self):
+        """Полный пересчет сводной таблицы farmer_financial_summary (после загрузки в обход триггеров)"""
+        try:
+            self.clear_unread_results()
+            self.begin()
+            self.cur.execute("DELETE FROM farmer_financial_summary")
+            self.cur.execute("""
+                INSERT INTO farmer_financial_summary (
+                    farmer_id, products_count, products_value, total_profit,
+                    needs_count, needs_cost,
+                    needs_required_count, needs_required_cost,
+                    needs_in_progress_count, needs_in_progress_cost,
+                    needs_purchased_count, needs_purchased_cost)
+                SELECT 
+                    f.farmer_id,
+                    COALESCE(p.products_count, 0),
+                    COALESCE(p.products_value, 0),
+                    COALESCE(p.total_profit, 0),
+                    COALESCE(n.needs_count, 0),
+                    COALESCE(n.needs_cost, 0),
+                    COALESCE(n.needs_required_count, 0),
+                    COALESCE(n.needs_required_cost, 0),
+                    COALESCE(n.needs_in_progress_count, 0),
+                    COALESCE(n.needs_in_progress_cost, 0),
+                    COALESCE(n.needs_purchased_count, 0),
+                    COALESCE(n.needs_purchased_cost, 0)
+                FROM farmers f
+                LEFT JOIN (
+                    SELECT 
+                        farmer_id,
+                        COUNT(*) as products_count,
+                        SUM(quantity * unit_price) as products_value,
+                        SUM(COALESCE(quantity * (unit_price - production_cost), 0)) as total_profit
+                    FROM products
+                    GROUP BY farmer_id
+                ) p ON p.farmer_id = f.farmer_id
+                LEFT JOIN (
+                    SELECT 
+                        farmer_id,
+                        COUNT(*) as needs_count,
+                        SUM(COALESCE(price * required_quantity, 0)) as needs_cost,
+                        SUM(status <=> 'Требуется') as needs_required_count,
+                        SUM(IF(status <=> 'Требуется', COALESCE(price * required_quantity, 0), 0))
+                            as needs_required_cost,
+                        SUM(status <=> 'В процессе') as needs_in_progress_count,
+                        SUM(IF(status <=> 'В процессе', COALESCE(price * required_quantity, 0), 0))
+                            as needs_in_progress_cost,
+                        SUM(status <=> 'Закуплено') as needs_purchased_count,
+                        SUM(IF(status <=> 'Закуплено', COALESCE(price * required_quantity, 0), 0))
+                            as needs_purchased_cost
+                    FROM needs
+                    GROUP BY farmer_id
+                ) n ON n.farmer_id = f.farmer_id
+            """)
+            self.con.commit()
+            self.invalidate('products', 'needs')
+            return True
+        except Error:
+            self.con.rollback()
+            return False
+
+    # ========== УПРАВЛЕНИЕ ДАННЫМИ ==========
+
+    @cached('farmers')
+    def get_all_farmers(self):
+        """Получение списка всех фермеров (исключая администраторов)"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(ALL_FARMERS_SQL)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('farmers')
+    def get_farmer_names(self):
+        """ID и ФИО фермеров для выпадающих списков (без остальных колонок)"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("""
+                SELECT farmer_id, full_name
+                FROM farmers
+                WHERE role != 'Администратор'
+                ORDER BY farmer_id
+            """)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('farmers')
+    def search_farmers(self, search_term, limit=None):
+        """Поиск фермеров по ФИО, адресу или логину (по релевантности)"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(*self.search_farmers_query(search_term, limit))
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @classmethod
+    def search_farmers_query(cls, search_term, limit=None):
+        """SQL и параметры поиска фермеров"""
+        query = cls.fulltext_query(search_term)
+        if query is not None:
+            condition = "MATCH(full_name, address, login) AGAINST (%s IN BOOLEAN MODE)"
+            order = "MATCH(full_name, address, login) AGAINST (%s IN BOOLEAN MODE) DESC, farmer_id"
+            params = [query, query]
+        else:
+            # Слишком короткий запрос - поиск по началу ФИО или логина (индексы)
+            condition = "(full_name LIKE %s OR login LIKE %s)"
+            order = "farmer_id"
+            params = [cls.like_prefix(search_term)] * 2
+
+        limit_clause = "LIMIT %s" if limit else ""
+        if limit:
+            params.append(limit)
+        return f"""
+            SELECT farmer_id, full_name, address, phone, login
+            FROM farmers 
+            WHERE {condition}
+            AND role != 'Администратор'
+            ORDER BY {order}
+            {limit_clause}
+        """, params
+
+    def get_farmer_by_id(self, farmer_id):
+        """Получение данных фермера по ID"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("SELECT * FROM farmers WHERE farmer_id = %s", (farmer_id,))
+            return self.cur.fetchone()
+        except Error:
+            return None
+
+    def update_farmer(self, farmer_id, full_name, address, phone, email):
+        """Обновление данных фермера"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("""
+                UPDATE farmers 
+                SET full_name = %s, address = %s, phone = %s, email = %s 
+                WHERE farmer_id = %s
+            """, (full_name, address, phone, email, farmer_id))
+            self.con.commit()
+            self.invalidate('farmers')
+            return self.cur.rowcount > 0
+        except Error:
+            self.con.rollback()
+            return False
+
+    def delete_farmer(self, farmer_id):
+        """Удаление фермера и связанных данных"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("DELETE FROM farmers WHERE farmer_id = %s", (farmer_id,))
+            self.con.commit()
+            self.invalidate('farmers', 'products', 'needs')
+            return self.cur.rowcount > 0
+        except Error:
+            self.con.rollback()
+            return False
+
+    @cached('products')
+    def get_farmer_products(self, farmer_id):
+        """Получение продукции конкретного фермера"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(FARMER_PRODUCTS_SQL, (farmer_id,))
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('needs')
+    def get_farmer_needs(self, farmer_id):
+        """Получение потребностей конкретного фермера"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(FARMER_NEEDS_SQL, (farmer_id,))
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('farmers', 'products')
+    def get_all_products(self):
+        """Получение всей продукции всех фермеров"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(ALL_PRODUCTS_SQL)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('farmers', 'needs')
+    def get_all_needs(self):
+        """Получение всех потребностей всех фермеров"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(ALL_NEEDS_SQL)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    def add_farmer(self, full_name, address, phone, login, password_hash):
+        """Добавление фермера"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("""
+                INSERT INTO farmers (full_name, address, phone, login, password_hash, role)
+                VALUES (%s, %s, %s, %s, %s, 'Фермер')
+            """, (full_name, address, phone, login, password_hash))
+            self.con.commit()
+            self.invalidate('farmers')
+            return self.cur.lastrowid
+        except Error:
+            self.con.rollback()
+            raise
+
+    def get_product_by_id(self, product_id):
+        """Получение записи продукции по ID"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("SELECT * FROM products WHERE product_id = %s", (product_id,))
+            return self.cur.fetchone()
+        except Error:
+            return None
+
+    def add_product(self, farmer_id, product_name, quantity, quality, unit_price, production_cost):
+        """Добавление продукции (дата производства - текущая)"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("""
+                INSERT INTO products (farmer_id, product_name, quantity, quality, 
+                                      unit_price, production_cost, production_date)
+                VALUES (%s, %s, %s, %s, %s, %s, CURDATE())
+            """, (farmer_id, product_name, quantity, quality, unit_price, production_cost))
+            self.con.commit()
+            self.invalidate('products')
+            return self.cur.lastrowid
+        except Error:
+            self.con.rollback()
+            raise
+
+    def update_product(self, product_id, product_name, quantity, quality, unit_price, production_cost):
+        """Обновление записи продукции"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("""
+                UPDATE products 
+                SET product_name = %s, quantity = %s, quality = %s, 
+                    unit_price = %s, production_cost = %s
+                WHERE product_id = %s
+            """, (product_name, quantity, quality, unit_price, production_cost, product_id))
+            self.con.commit()
+            self.invalidate('products')
+        except Error:
+            self.con.rollback()
+            raise
+
+    def delete_product(self, product_id):
+        """Удаление записи продукции"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("DELETE FROM products WHERE product_id = %s", (product_id,))
+            self.con.commit()
+            self.invalidate('products')
+            return self.cur.rowcount > 0
+        except Error:
+            self.con.rollback()
+            raise
+
+    def get_need_by_id(self, need_id):
+        """Получение потребности по ID"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("SELECT * FROM needs WHERE need_id = %s", (need_id,))
+            return self.cur.fetchone()
+        except Error:
+            return None
+
+    def add_need(self, farmer_id, need_name, need_type, price, required_quantity, status):
+        """Добавление потребности (дата покупки не заполняется)"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("""
+                INSERT INTO needs (farmer_id, need_name, need_type, price, 
+                                   required_quantity, status, purchase_date)
+                VALUES (%s, %s, %s, %s, %s, %s, NULL)
+            """, (farmer_id, need_name, need_type, price, required_quantity, status))
+            self.con.commit()
+            self.invalidate('needs')
+            return self.cur.lastrowid
+        except Error:
+            self.con.rollback()
+            raise
+
+    def update_need(self, need_id, need_name, need_type, price, required_quantity, status):
+        """Обновление потребности"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("""
+                UPDATE needs 
+                SET need_name = %s, need_type = %s, price = %s, 
+                    required_quantity = %s, status = %s
+                WHERE need_id = %s
+            """, (need_name, need_type, price, required_quantity, status, need_id))
+            self.con.commit()
+            self.invalidate('needs')
+        except Error:
+            self.con.rollback()
+            raise
+
+    def delete_need(self, need_id):
+        """Удаление потребности"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute("DELETE FROM needs WHERE need_id = %s", (need_id,))
+            self.con.commit()
+            self.invalidate('needs')
+            return self.cur.rowcount > 0
+        except Error:
+            self.con.rollback()
+            raise
+
+    @cached('farmers', 'needs')
+    def get_needs_by_status(self, status):
+        """Получение потребностей всех фермеров с заданным статусом"""
+        try:
+            self.clear_unread_results()
+            self.cur.execute(NEEDS_BY_STATUS_SQL, (status,))
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    # ========== ПОСТРАНИЧНАЯ ЗАГРУЗКА ==========
+
+    @cached('farmers')
+    def get_farmers_page(self, last_id=None, limit=500):
+        """Страница списка фермеров (keyset-пагинация по farmer_id)"""
+        try:
+            self.clear_unread_results()
+            condition = "AND farmer_id > %s" if last_id is not None else ""
+            params = (last_id, limit) if last_id is not None else (limit,)
+            self.cur.execute(f"""
+                SELECT farmer_id, full_name, address, phone, login, email, 
+                       created_at as registration_date, role
+                FROM farmers 
+                WHERE role != 'Администратор' {condition}
+                ORDER BY farmer_id
+                LIMIT %s
+            """, params)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('farmers', 'products')
+    def get_products_page(self, last_id=None, limit=500):
+        """Страница продукции всех фермеров (keyset-пагинация по product_id)"""
+        try:
+            self.clear_unread_results()
+            condition = "WHERE p.product_id < %s" if last_id is not None else ""
+            params = (last_id, limit) if last_id is not None else (limit,)
+            self.cur.execute(f"""
+                SELECT p.*, f.full_name 
+                FROM products p 
+                LEFT JOIN farmers f ON p.farmer_id = f.farmer_id
+                {condition}
+                ORDER BY p.product_id DESC
+                LIMIT %s
+            """, params)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    @cached('farmers', 'needs')
+    def get_needs_page(self, last_id=None, limit=500):
+        """Страница потребностей всех фермеров (keyset-пагинация по need_id)"""
+        try:
+            self.clear_unread_results()
+            condition = "WHERE n.need_id < %s" if last_id is not None else ""
+            params = (last_id, limit) if last_id is not None else (limit,)
+            self.cur.execute(f"""
+                SELECT 
+                    n.need_id,
+                    n.farmer_id,
+                    n.need_name,
+                    n.need_type as type,
+                    n.price,
+                    n.required_quantity as quantity,
+                    n.status,
+                    n.purchase_date,
+                    n.notes,
+                    f.full_name 
+                FROM needs n 
+                LEFT JOIN farmers f ON n.farmer_id = f.farmer_id
+                {condition}
+                ORDER BY n.need_id DESC
+                LIMIT %s
+            """, params)
+            return self.cur.fetchall()
+        except Error:
+            return []
+
+    # ========== ПОТОКОВАЯ ВЫГРУЗКА ==========
+
+    def report_query(self, method_name, *args):
+        """SQL и параметры метода-отчета для потоковой выгрузки (None, если метод не сводится к одному запросу)"""
+        if method_name in STREAMABLE_QUERIES:
+            return STREAMABLE_QUERIES[method_name], args
+        if method_name == 'get_product_production':
+            return self.product_production_query(*args)
+        if method_name == 'search_farmers':
+            return self.search_farmers_query(*args)
+        return None
+
+    def stream_rows(self, sql, params=(), batch_size=1000):
+        """Потоковое чтение результата пачками: (названия колонок, список кортежей)
+
+        Курсор небуферизованный, строки читаются с сервера по мере выборки, поэтому
+        в памяти одновременно не больше batch_size строк. Занимает соединение до конца
+        чтения - вызывать в фоне через Database.submit.
+        """
+        self.clear_unread_results()
+        cur = self.instrument(self.con.cursor())
+        finished = False
+        try:
+            cur.execute(sql, params)
+            columns = [column[0] for column in cur.description]
+            rows = cur.fetchmany(batch_size)
+            # Первая пачка отдается всегда (даже пустая), чтобы были известны колонки
+            yield columns, rows
+            while rows:
+                rows = cur.fetchmany(batch_size)
+                if rows:
+                    yield columns, rows
+            finished = True
+        finally:
+            if finished:
+                cur.close()
+            else:
+                # Недочитанный результат: разрываем соединение, пул переподключит его
+                try:
+                    self.con.disconnect()
+                except Error:
+                    pass
@@ -0,0 +1,151 @@
+# exporter.py
+"""Потоковая выгрузка отчетов и списков в CSV/XLSX
+
+Запуск из командной строки (имя метода Database и его аргументы):
+    python exporter.py get_regional_production продукция.xlsx
+    python exporter.py get_product_production пшеница.csv Пшеница
+"""
+import argparse
+import csv
+import os
+import sys
+from contextlib import closing
+
+# Число строк, читаемых с сервера и записываемых в файл за один раз
+BATCH_SIZE = 1000
+
+
+class ExportCancelled(Exception):
+    """Выгрузка прервана пользователем (rows - сколько строк успели записать)"""
+
+    def __init__(self, rows):
+        super().__init__("Выгрузка прервана")
+        self.rows = rows
+
+
+# ========== ЗАПИСЬ ФАЙЛОВ ==========
+
+class CsvWriter:
+    """Построчная запись CSV (UTF-8 с BOM для Excel)"""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file)
+
+    def write_rows(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxWriter:
+    """Запись XLSX в режиме write-only: строки сразу сбрасываются во временный файл"""
+
+    def __init__(self, path):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise Exception("Для выгрузки в XLSX установите пакет openpyxl")
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("Отчет")
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.sheet.append(list(row))
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+def open_writer(path):
+    """Запись в формате по расширению файла"""
+    if path.lower().endswith('.xlsx'):
+        return XlsxWriter(path)
+    return CsvWriter(path)
+
+
+# ========== ВЫГРУЗКА ==========
+
+def _method_batches(db, method_name, args, batch_size):
+    """Пачки строк из результата метода (для отчетов, которые не сводятся к одному запросу)"""
+    data = getattr(db, method_name)(*args) or []
+    columns = []
+    for row in data:
+        columns.extend(key for key in row if key not in columns)
+    if not data:
+        yield columns, []
+    for start in range(0, len(data), batch_size):
+        yield columns, [tuple(row.get(key) for key in columns)
+                        for row in data[start:start + batch_size]]
+
+
+def export_report(db, method_name, args, path, headers=None, batch_size=BATCH_SIZE,
+                  progress=None, cancel_event=None):
+    """Выгрузка результата метода Database в CSV/XLSX без загрузки всего результата в память
+
+    Строки читаются небуферизованным курсором пачками по batch_size и сразу пишутся в файл.
+    progress(rows) вызывается после каждой пачки, cancel_event (threading.Event) прерывает
+    выгрузку; недописанный файл при отмене или ошибке удаляется. Возвращает число строк.
+    """
+    query = db.report_query(method_name, *args)
+    if query is not None:
+        batches = db.stream_rows(*query, batch_size=batch_size)
+    else:
+        batches = _method_batches(db, method_name, args, batch_size)
+
+    writer = open_writer(path)
+    written = 0
+    completed = False
+    try:
+        with closing(batches):
+            for columns, rows in batches:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ExportCancelled(written)
+                if written == 0:
+                    writer.write_rows([headers or columns])
+                writer.write_rows(rows)
+                written += len(rows)
+                if progress:
+                    progress(written)
+        completed = True
+    finally:
+        writer.close()
+        if not completed and os.path.exists(path):
+            os.remove(path)
+    return written
+
+
+def main(argv=None):
+    """Выгрузка из командной строки"""
+    parser = argparse.ArgumentParser(description="Выгрузка отчетов в CSV/XLSX")
+    parser.add_argument('method', help="метод Database, например get_regional_production")
+    parser.add_argument('path', help="файл .csv или .xlsx")
+    parser.add_argument('args', nargs='*', help="аргументы метода")
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help="строк в одной пачке")
+    args = parser.parse_args(argv)
+
+    from config import Database
+    from time import perf_counter
+
+    db = Database()
+    started = perf_counter()
+    method_args = [int(arg) if arg.isdigit() else arg for arg in args.args]
+
+    try:
+        # Выгрузка на отдельном соединении из пула, как и в приложении
+        rows = db.submit(export_report, db, args.method, method_args, args.path, None, args.batch,
+                         lambda count: print(f"\r  Записано строк: {count}", end='', flush=True)
+                         ).result()
+        print(f"\n✓ Выгружено {rows} строк за {perf_counter() - started:.1f} с: {args.path}")
+        return 0
+    except Exception as e:
+        print(f"\n✗ Ошибка выгрузки: {e}")
+        return 2
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+# generate_data.py
+"""Генерация синтетических данных по схеме БД.txt для нагрузочного тестирования
+
+Данные детерминированы: один и тот же --seed дает одни и те же строки.
+Схема должна быть создана заранее (mysql < БД.txt). Пример:
+    python generate_data.py --farmers 100000 --products 5000000 --needs 5000000 --reset
+"""
+import argparse
+import random
+import sys
+from datetime import date, timedelta
+from time import perf_counter
+from config import Database
+
+# Строк в одном INSERT (executemany) и одной транзакции
+BATCH_SIZE = 10000
+
+SURNAMES = ["Иванов", "Петров", "Сидоров", "Смирнов", "Кузнецов", "Попов", "Васильев",
+            "Соколов", "Михайлов", "Новиков", "Федоров", "Морозов", "Волков", "Алексеев",
+            "Лебедев", "Семенов", "Егоров", "Павлов", "Козлов", "Степанов"]
+FIRST_NAMES = ["Иван", "Петр", "Алексей", "Сергей", "Андрей", "Дмитрий", "Николай",
+               "Михаил", "Владимир", "Олег", "Юрий", "Виктор"]
+PATRONYMICS = ["Иванович", "Петрович", "Алексеевич", "Сергеевич", "Андреевич",
+               "Дмитриевич", "Николаевич", "Михайлович"]
+CITIES = ["г. Москва", "г. Санкт-Петербург", "г. Казань", "г. Воронеж", "г. Краснодар",
+          "г. Ростов-на-Дону", "г. Самара", "г. Саратов", "г. Омск", "г. Новосибирск"]
+STREETS = ["ул. Ленина", "ул. Пушкина", "ул. Баумана", "ул. Садовая", "ул. Полевая",
+           "ул. Молодежная", "ул. Центральная", "ул. Лесная"]
+
+# Продукция: название -> (цена за единицу, себестоимость)
+PRODUCTS = {
+    "Пшеница": (25.50, 15.00), "Ячмень": (20.00, 12.50), "Картофель": (15.75, 8.00),
+    "Морковь": (18.25, 10.50), "Говядина": (350.00, 250.00), "Молоко": (45.00, 30.00),
+    "Подсолнечник": (32.00, 21.00), "Кукуруза": (18.00, 11.00), "Свекла": (14.00, 7.50),
+    "Яйца": (9.00, 5.50), "Капуста": (12.00, 6.00), "Овес": (17.00, 10.00),
+}
+QUALITIES = ["Высший сорт", "Первый сорт", "Второй сорт", "Экстра", "Отборная", "Премиум"]
+
+# Потребности: название -> (тип, цена)
+NEEDS = {
+    "Удобрения азотные": ("Товар", 5000.00), "Трактор в аренду": ("Услуга", 15000.00),
+    "Система полива": ("Товар", 25000.00), "Агрономическая консультация": ("Услуга", 5000.00),
+    "Корма для КРС": ("Товар", 30000.00), "Ветеринарные услуги": ("Услуга", 8000.00),
+    "Семена": ("Товар", 12000.00), "Горючее": ("Товар", 7000.00),
+    "Ремонт техники": ("Услуга", 20000.00), "Доставка урожая": ("Услуга", 9000.00),
+}
+NEED_STATUSES = ["Требуется", "Закуплено", "В процессе"]
+
+FARMER_PASSWORD = "Farmer123"
+# Даты отсчитываются от фиксированного дня, чтобы данные не зависели от даты запуска
+END_DATE = date(2025, 1, 1)
+
+
+def insert_batches(db, sql, rows, total, label, batch_size=BATCH_SIZE):
+    """Запись строк генератора пачками executemany, одна транзакция на пачку"""
+    started = perf_counter()
+    batch = []
+    written = 0
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.cur.executemany(sql, batch)
+            db.con.commit()
+            written += len(batch)
+            batch.clear()
+            elapsed = perf_counter() - started
+            print(f"\r  {label}: {written}/{total} ({written / elapsed:.0f} строк/с)", end='', flush=True)
+    if batch:
+        db.cur.executemany(sql, batch)
+        db.con.commit()
+        written += len(batch)
+    print(f"\r  {label}: {written}/{total} за {perf_counter() - started:.1f} с" + " " * 20)
+
+
+def farmer_rows(rng, count, password_hash):
+    for n in range(1, count + 1):
+        full_name = f"{rng.choice(SURNAMES)} {rng.choice(FIRST_NAMES)} {rng.choice(PATRONYMICS)}"
+        address = f"{rng.choice(CITIES)}, {rng.choice(STREETS)}, д. {rng.randint(1, 200)}"
+        phone = f"79{rng.randint(0, 999999999):09d}"
+        yield (full_name, address, f"farmer{n}", password_hash, phone, f"farmer{n}@example.com")
+
+
+def product_rows(rng, count, farmer_ids):
+    names = list(PRODUCTS)
+    start = END_DATE - timedelta(days=3 * 365)
+    for _ in range(count):
+        name = rng.choice(names)
+        price, cost = PRODUCTS[name]
+        factor = rng.uniform(0.8, 1.2)
+        quantity = round(rng.uniform(10, 5000), 2)
+        yield (rng.choice(farmer_ids), name, quantity, rng.choice(QUALITIES),
+               round(price * factor, 2), start + timedelta(days=rng.randint(0, 3 * 365)),
+               round(quantity * rng.uniform(0, 1), 2), round(cost * factor, 2))
+
+
+def need_rows(rng, count, farmer_ids):
+    names = list(NEEDS)
+    start = END_DATE - timedelta(days=365)
+    for _ in range(count):
+        name = rng.choice(names)
+        need_type, price = NEEDS[name]
+        status = rng.choice(NEED_STATUSES)
+        purchase_date = start + timedelta(days=rng.randint(0, 365)) if status == "Закуплено" else None
+        yield (rng.choice(farmer_ids), name, need_type, round(price * rng.uniform(0.8, 1.2), 2),
+               round(rng.uniform(1, 10), 0), status, purchase_date, None)
+
+
+def reset_data(db):
+    """Очистка таблиц (администратор создается заново)"""
+    db.cur.execute("SET FOREIGN_KEY_CHECKS = 0")
+    for table in ("needs", "products", "farmer_financial_summary", "farmers"):
+        db.cur.execute(f"TRUNCATE TABLE {table}")
+    db.cur.execute("SET FOREIGN_KEY_CHECKS = 1")
+    db.cur.execute("""
+        INSERT INTO farmers (full_name, address, login, password_hash, role)
+        VALUES ('Администратор системы', 'Центральный офис', 'admin', SHA2('Admin123', 256), 'Администратор')
+    """)
+    db.con.commit()
+
+
+def generate(db, farmers, products, needs, seed=42, reset=False, batch_size=BATCH_SIZE):
+    """Заполнение базы: farmers фермеров, products записей продукции и needs потребностей"""
+    rng = random.Random(seed)
+    if reset:
+        print("Очистка таблиц...")
+        reset_data(db)
+
+    insert_batches(db, """
+        INSERT INTO farmers (full_name, address, login, password_hash, phone, email)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """, farmer_rows(rng, farmers, Database.hash_password(FARMER_PASSWORD)),
+        farmers, "Фермеры", batch_size)
+
+    db.cur.execute("SELECT farmer_id FROM farmers WHERE role != 'Администратор' ORDER BY farmer_id")
+    farmer_ids = [row['farmer_id'] for row in db.cur.fetchall()]
+    if not farmer_ids:
+        raise Exception("В базе нет фермеров")
+
+    insert_batches(db, """
+        INSERT INTO products (farmer_id, product_name, quantity, quality, unit_price,
+                              production_date, sold_quantity, production_cost)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, product_rows(rng, products, farmer_ids), products, "Продукция", batch_size)
+
+    insert_batches(db, """
+        INSERT INTO needs (farmer_id, need_name, need_type, price, required_quantity,
+                           status, purchase_date, notes)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, need_rows(rng, needs, farmer_ids), needs, "Потребности", batch_size)
+
+    db.cur.execute("ANALYZE TABLE farmers, products, needs, farmer_financial_summary")
+    db.cur.fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генерация синтетических данных фермерской БД")
+    parser.add_argument('--farmers', type=int, default=1000)
+    parser.add_argument('--products', type=int, default=50000)
+    parser.add_argument('--needs', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help="строк в одной транзакции")
+    parser.add_argument('--reset', action='store_true', help="очистить таблицы перед генерацией")
+    args = parser.parse_args(argv)
+
+    db = Database()
+    started = perf_counter()
+    try:
+        generate(db, args.farmers, args.products, args.needs, args.seed, args.reset, args.batch)
+        print(f"✓ Данные сгенерированы за {perf_counter() - started:.1f} с")
+        return 0
+    except Exception as e:
+        print(f"\n✗ Ошибка генерации: {e}")
+        return 2
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,402 @@
+# importer.py
+"""Массовый импорт продукции и потребностей из CSV/XLSX
+
+Запуск из командной строки:
+    python importer.py products урожай.csv --errors ошибки.csv
+    python importer.py needs потребности.xlsx --batch 5000
+"""
+import argparse
+import codecs
+import csv
+import sys
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from mysql.connector import Error
+
+# Число строк в одном INSERT (executemany) и одной транзакции
+BATCH_SIZE = 5000
+
+# Максимальное значение для DECIMAL(10, 2)
+MAX_DECIMAL = Decimal("99999999.99")
+# Максимальный размер TEXT в байтах (кириллица занимает 2 байта в UTF-8)
+MAX_TEXT_BYTES = 65535
+
+# Кодировки CSV в порядке проверки: UTF-8 (с BOM или без) и cp1251 (Excel в русской Windows)
+CSV_ENCODINGS = ('utf-8-sig', 'cp1251')
+
+NEED_TYPES = ('Товар', 'Услуга')
+NEED_STATUSES = ('Требуется', 'Закуплено', 'В процессе')
+
+# Колонки файла: поле -> возможные заголовки (без учета регистра)
+PRODUCT_COLUMNS = {
+    'farmer': ('farmer', 'farmer_id', 'login', 'фермер', 'логин'),
+    'product_name': ('product_name', 'название продукции', 'продукция'),
+    'quantity': ('quantity', 'количество'),
+    'quality': ('quality', 'качество'),
+    'unit_price': ('unit_price', 'price', 'цена за ед.', 'цена'),
+    'production_date': ('production_date', 'дата производства'),
+    'sold_quantity': ('sold_quantity', 'продано'),
+    'production_cost': ('production_cost', 'себестоимость'),
+}
+
+NEED_COLUMNS = {
+    'farmer': ('farmer', 'farmer_id', 'login', 'фермер', 'логин'),
+    'need_name': ('need_name', 'название потребности', 'потребность'),
+    'need_type': ('need_type', 'type', 'тип'),
+    'price': ('price', 'цена'),
+    'required_quantity': ('required_quantity', 'quantity', 'требуемое количество', 'количество'),
+    'status': ('status', 'статус'),
+    'purchase_date': ('purchase_date', 'дата покупки'),
+    'notes': ('notes', 'примечания'),
+}
+
+PRODUCT_INSERT = """
+    INSERT INTO products (farmer_id, product_name, quantity, quality, unit_price,
+                          production_date, sold_quantity, production_cost)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+NEED_INSERT = """
+    INSERT INTO needs (farmer_id, need_name, need_type, price, required_quantity,
+                       status, purchase_date, notes)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+
+class ImportCancelled(Exception):
+    """Импорт прерван пользователем (stats - уже загруженные строки)"""
+
+    def __init__(self, stats):
+        super().__init__("Импорт прерван")
+        self.stats = stats
+
+
+# ========== ЧТЕНИЕ ФАЙЛОВ ==========
+
+def read_rows(path, encoding=None):
+    """Потоковое чтение строк файла: (номер строки, словарь заголовок -> значение)
+
+    encoding - кодировка CSV (None - определяется по файлу до чтения первой строки).
+    """
+    if path.lower().endswith(('.xlsx', '.xlsm')):
+        yield from _read_xlsx(path)
+    else:
+        yield from _read_csv(path, encoding or detect_encoding(path))
+
+
+def detect_encoding(path, block_size=1 << 20):
+    """Кодировка CSV из CSV_ENCODINGS, в которой читается весь файл
+
+    Файл проверяется целиком до импорта: ошибка декодирования в середине потока
+    произошла бы уже после записи первых пачек.
+    """
+    for encoding in CSV_ENCODINGS:
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(block_size), b''):
+                    decoder.decode(block)
+            decoder.decode(b'', final=True)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    raise Exception(f"Не удалось определить кодировку файла (ожидается {', '.join(CSV_ENCODINGS)})")
+
+
+def _read_csv(path, encoding):
+    with open(path, newline='', encoding=encoding) as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        for line_no, row in enumerate(csv.DictReader(f, dialect=dialect), start=2):
+            yield line_no, row
+
+
+def _read_xlsx(path):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise Exception("Для импорта XLSX установите пакет openpyxl")
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [str(h) if h is not None else '' for h in next(rows, ())]
+        for line_no, values in enumerate(rows, start=2):
+            if values is None or all(v is None for v in values):
+                continue
+            yield line_no, dict(zip(headers, values))
+    finally:
+        workbook.close()
+
+
+def map_columns(headers, columns):
+    """Сопоставление заголовков файла с полями таблицы"""
+    normalized = {str(h).strip().lower(): h for h in headers if h is not None}
+    mapping = {}
+    for field, aliases in columns.items():
+        source = next((normalized[alias] for alias in aliases if alias in normalized), None)
+        if source is not None:
+            mapping[field] = source
+    return mapping
+
+
+# ========== ПРОВЕРКА ЗНАЧЕНИЙ ==========
+
+def _text(value, name, max_length=None, required=False, max_bytes=None):
+    text = '' if value is None else str(value).strip()
+    if required and not text:
+        raise ValueError(f"не заполнено поле '{name}'")
+    if max_length is not None and len(text) > max_length:
+        raise ValueError(f"поле '{name}' длиннее {max_length} символов")
+    if max_bytes is not None and len(text.encode('utf-8')) > max_bytes:
+        raise ValueError(f"поле '{name}' длиннее {max_bytes} байт")
+    return text or None
+
+
+def _decimal(value, name, default=None, required=False):
+    if value is None or str(value).strip() == '':
+        if required:
+            raise ValueError(f"не заполнено поле '{name}'")
+        return default
+    try:
+        number = Decimal(str(value).strip().replace(' ', '').replace(',', '.'))
+    except InvalidOperation:
+        raise ValueError(f"поле '{name}' не является числом: {value}")
+    if not number.is_finite() or number < 0 or number > MAX_DECIMAL:
+        raise ValueError(f"поле '{name}' вне допустимого диапазона: {value}")
+    return number.quantize(Decimal("0.01"))
+
+
+def _date(value, name, default=None):
+    if value is None or str(value).strip() == '':
+        return default
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    text = str(value).strip()
+    for fmt in ('%Y-%m-%d', '%d.%m.%Y', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"поле '{name}' не является датой: {value}")
+
+
+def _choice(value, name, choices, default):
+    text = '' if value is None else str(value).strip()
+    if not text:
+        return default
+    if text not in choices:
+        raise ValueError(f"поле '{name}' должно быть одним из: {', '.join(choices)}")
+    return text
+
+
+class FarmerLookup:
+    """Поиск farmer_id по ID, логину или ФИО (справочник загружается одним запросом)"""
+
+    def __init__(self, db):
+        db.clear_unread_results()
+        db.cur.execute("""
+            SELECT farmer_id, full_name, login
+            FROM farmers
+            WHERE role != 'Администратор'
+        """)
+        self.ids = set()
+        self.by_login = {}
+        self.by_name = {}
+        for farmer in db.cur.fetchall():
+            self.ids.add(farmer['farmer_id'])
+            self.by_login[farmer['login'].lower()] = farmer['farmer_id']
+            name = farmer['full_name'].strip().lower()
+            # Одинаковые ФИО у разных фермеров - однозначно определить нельзя
+            self.by_name[name] = None if name in self.by_name else farmer['farmer_id']
+
+    def resolve(self, value):
+        text = '' if value is None else str(value).strip()
+        if not text:
+            raise ValueError("не указан фермер")
+        if text.isdigit() and int(text) in self.ids:
+            return int(text)
+        key = text.lower()
+        if key in self.by_login:
+            return self.by_login[key]
+        if key in self.by_name:
+            if self.by_name[key] is None:
+                raise ValueError(f"ФИО '{text}' есть у нескольких фермеров, укажите логин")
+            return self.by_name[key]
+        raise ValueError(f"фермер '{text}' не найден")
+
+
+def product_values(row, farmer_id, today):
+    """Кортеж значений для INSERT INTO products"""
+    return (farmer_id,
+            _text(row.get('product_name'), 'product_name', 255, required=True),
+            _decimal(row.get('quantity'), 'quantity', default=Decimal(0)),
+            _text(row.get('quality'), 'quality', 100),
+            _decimal(row.get('unit_price'), 'unit_price', required=True),
+            _date(row.get('production_date'), 'production_date', default=today),
+            _decimal(row.get('sold_quantity'), 'sold_quantity', default=Decimal(0)),
+            _decimal(row.get('production_cost'), 'production_cost', default=Decimal(0)))
+
+
+def need_values(row, farmer_id, today):
+    """Кортеж значений для INSERT INTO needs"""
+    return (farmer_id,
+            _text(row.get('need_name'), 'need_name', 255, required=True),
+            _choice(row.get('need_type'), 'need_type', NEED_TYPES, 'Товар'),
+            _decimal(row.get('price'), 'price', required=True),
+            _decimal(row.get('required_quantity'), 'required_quantity', default=Decimal(1)),
+            _choice(row.get('status'), 'status', NEED_STATUSES, 'Требуется'),
+            _date(row.get('purchase_date'), 'purchase_date'),
+            _text(row.get('notes'), 'notes', max_bytes=MAX_TEXT_BYTES))
+
+
+IMPORT_KINDS = {
+    'products': (PRODUCT_COLUMNS, product_values, PRODUCT_INSERT),
+    'needs': (NEED_COLUMNS, need_values, NEED_INSERT),
+}
+
+
+# ========== ИМПОРТ ==========
+
+def import_file(db, kind, path, errors_path=None, batch_size=BATCH_SIZE,
+                progress=None, cancel_event=None, encoding=None):
+    """Импорт файла в таблицу products или needs
+
+    progress(processed, imported, failed) вызывается после каждой пачки строк,
+    cancel_event (threading.Event) прерывает импорт между пачками и при построчной записи
+    пачки; пачка, прерванная отменой, откатывается целиком.
+    Каждая пачка записывается одним executemany в отдельной транзакции; если сервер
+    отклоняет пачку, она записывается построчно, и в ошибки попадают только плохие строки.
+    Ошибочные строки пишутся в errors_path (файл создается при первой ошибке).
+    encoding - кодировка CSV (None - определяется до записи первой пачки).
+    Возвращает словарь с количеством обработанных, загруженных и ошибочных строк.
+    """
+    columns, make_values, insert_sql = IMPORT_KINDS[kind]
+    farmers = FarmerLookup(db)
+    today = date.today()
+
+    stats = {'processed': 0, 'imported': 0, 'failed': 0}
+    batch = []
+    mapping = None
+    errors = {'file': None, 'writer': None}
+
+    def write_error(line_no, message):
+        if not errors_path:
+            return
+        if errors['writer'] is None:
+            errors['file'] = open(errors_path, 'w', newline='', encoding='utf-8-sig')
+            errors['writer'] = csv.writer(errors['file'])
+            errors['writer'].writerow(["Строка", "Ошибка"])
+        errors['writer'].writerow([line_no, message])
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    def flush():
+        if not batch:
+            return
+        if cancelled():
+            raise ImportCancelled(dict(stats))
+        try:
+            db.begin()
+            db.cur.executemany(insert_sql, [values for _, values in batch])
+            db.con.commit()
+            stats['imported'] += len(batch)
+        except Error:
+            db.con.rollback()
+            # Запрос прерван отменой (KILL QUERY при закрытии окна), а не плохими данными
+            if cancelled():
+                raise ImportCancelled(dict(stats))
+            # Ошибка отменяет только свою строку, остальные строки пачки сохраняются
+            imported = 0
+            db.begin()
+            for line_no, values in batch:
+                if cancelled():
+                    break
+                try:
+                    db.cur.execute(insert_sql, values)
+                    imported += 1
+                except Error as e:
+                    if cancelled():
+                        break
+                    stats['failed'] += 1
+                    write_error(line_no, str(e))
+            if cancelled():
+                db.con.rollback()
+                raise ImportCancelled(dict(stats))
+            db.con.commit()
+            stats['imported'] += imported
+        batch.clear()
+        if progress:
+            progress(stats['processed'], stats['imported'], stats['failed'])
+
+    try:
+        db.clear_unread_results()
+        for line_no, raw in read_rows(path, encoding):
+            if mapping is None:
+                mapping = map_columns(raw.keys(), columns)
+                if 'farmer' not in mapping:
+                    raise Exception("В файле нет колонки с фермером (farmer / login / Фермер)")
+
+            stats['processed'] += 1
+            row = {field: raw.get(source) for field, source in mapping.items()}
+            try:
+                batch.append((line_no, make_values(row, farmers.resolve(row.get('farmer')), today)))
+            except ValueError as e:
+                stats['failed'] += 1
+                write_error(line_no, str(e))
+
+            if len(batch) >= batch_size:
+                flush()
+        flush()
+    finally:
+        if errors['file']:
+            errors['file'].close()
+        if stats['imported']:
+            db.invalidate(kind)
+    return stats
+
+
+def main(argv=None):
+    """Импорт из командной строки"""
+    parser = argparse.ArgumentParser(description="Импорт продукции и потребностей из CSV/XLSX")
+    parser.add_argument('kind', choices=sorted(IMPORT_KINDS), help="таблица для импорта")
+    parser.add_argument('path', help="файл CSV или XLSX")
+    parser.add_argument('--errors', help="файл CSV для ошибочных строк")
+    parser.add_argument('--batch', type=int, default=BATCH_SIZE, help="строк в одной транзакции")
+    parser.add_argument('--encoding', choices=CSV_ENCODINGS,
+                        help="кодировка CSV (по умолчанию определяется по файлу)")
+    args = parser.parse_args(argv)
+
+    from config import Database
+    from time import perf_counter
+
+    db = Database()
+    started = perf_counter()
+
+    def report(processed, imported, failed):
+        elapsed = perf_counter() - started
+        print(f"\r  Обработано: {processed}, загружено: {imported}, ошибок: {failed} "
+              f"({processed / elapsed:.0f} строк/с)", end='', flush=True)
+
+    try:
+        stats = import_file(db, args.kind, args.path, args.errors, args.batch, progress=report,
+                            encoding=args.encoding)
+        print(f"\n✓ Импорт завершен за {perf_counter() - started:.1f} с: "
+              f"загружено {stats['imported']}, ошибок {stats['failed']}")
+        return 0 if not stats['failed'] else 1
+    except Exception as e:
+        print(f"\n✗ Ошибка импорта: {e}")
+        return 2
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+# migrate.py
+"""Обновление схемы существующей базы без потери данных
+
+БД.txt создает базу заново (DROP DATABASE). Для базы, в которой уже есть данные,
+недостающие объекты создаются этим скриптом; повторный запуск безопасен:
+    python migrate.py
+"""
+import argparse
+import os
+import re
+import sys
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'БД.txt')
+
+SUMMARY_TABLE = 'farmer_financial_summary'
+# Точность денежных колонок сводной таблицы: триггеры и пересчет должны совпадать до копейки
+SUMMARY_SCALE = 4
+# Отметка полнотекстовых индексов, построенных без стоп-слов (COMMENT индекса в БД.txt)
+FULLTEXT_COMMENT = 'ngram-nostopword'
+
+
+def script_statements(path=SCHEMA_PATH):
+    """Операторы SQL-скрипта с учетом DELIMITER (комментарии пропускаются)"""
+    delimiter = ';'
+    statement = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            stripped = line.strip()
+            if not statement and (not stripped or stripped.startswith('--')):
+                continue
+            if stripped.upper().startswith('DELIMITER '):
+                delimiter = stripped.split()[1]
+                continue
+            statement.append(line)
+            if stripped.endswith(delimiter):
+                text = ''.join(statement).rstrip()
+                yield text[:-len(delimiter)].strip()
+                statement = []
+
+
+def schema_objects(path=SCHEMA_PATH):
+    """Определения сводной таблицы и триггеров из БД.txt: (таблица, {имя триггера: SQL})"""
+    table = None
+    triggers = {}
+    for statement in script_statements(path):
+        match = re.match(r'CREATE\s+(TABLE|TRIGGER)\s+(\w+)', statement, re.IGNORECASE)
+        if not match:
+            continue
+        kind, name = match.group(1).upper(), match.group(2)
+        if kind == 'TABLE' and name == SUMMARY_TABLE:
+            table = statement
+        elif kind == 'TRIGGER':
+            triggers[name] = statement
+    if table is None or not triggers:
+        raise Exception(f"В {path} не найдены сводная таблица и триггеры")
+    return table, triggers
+
+
+def fulltext_indexes(path=SCHEMA_PATH):
+    """Полнотекстовые индексы из БД.txt: [(таблица, индекс, колонки)]"""
+    indexes = []
+    for statement in script_statements(path):
+        match = re.match(r'CREATE\s+TABLE\s+(\w+)', statement, re.IGNORECASE)
+        if not match:
+            continue
+        for name, columns in re.findall(r'FULLTEXT\s+INDEX\s+(\w+)\s*\(([^)]*)\)', statement,
+                                        re.IGNORECASE):
+            indexes.append((match.group(1), name, columns.strip()))
+    return indexes
+
+
+def index_comment(db, table, index):
+    """COMMENT индекса (None - индекса нет)"""
+    db.clear_unread_results()
+    db.cur.execute("""
+        SELECT INDEX_COMMENT AS comment
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+        LIMIT 1
+    """, (table, index))
+    row = db.cur.fetchone()
+    return row['comment'] if row else None
+
+
+def migrate_fulltext(db, path=SCHEMA_PATH):
+    """Создание недостающих индексов ngram и перестроение индексов, построенных со стоп-словами"""
+    # Стоп-слова учитываются в момент построения индекса
+    db.cur.execute("SET SESSION innodb_ft_enable_stopword = OFF")
+    for table, index, columns in fulltext_indexes(path):
+        comment = index_comment(db, table, index)
+        if comment == FULLTEXT_COMMENT:
+            continue
+        if comment is not None:
+            print(f"  {table}.{index}: перестроение без стоп-слов")
+            db.cur.execute(f"ALTER TABLE {table} DROP INDEX {index}")
+        else:
+            print(f"  {table}.{index}: создание")
+        db.cur.execute(f"ALTER TABLE {table} ADD FULLTEXT INDEX {index} ({columns}) "
+                       f"WITH PARSER ngram COMMENT '{FULLTEXT_COMMENT}'")
+
+
+def summary_scale(db):
+    """Число знаков после запятой у колонки products_value (None - таблицы нет)"""
+    db.clear_unread_results()
+    db.cur.execute("""
+        SELECT NUMERIC_SCALE AS scale
+        FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = 'products_value'
+    """, (SUMMARY_TABLE,))
+    row = db.cur.fetchone()
+    return row['scale'] if row else None
+
+
+def migrate_summary(db, path=SCHEMA_PATH):
+    """Сводная таблица, ее триггеры и полный пересчет по текущим данным"""
+    table_sql, triggers = schema_objects(path)
+
+    scale = summary_scale(db)
+    if scale is not None and scale != SUMMARY_SCALE:
+        # Таблица старого формата: данные все равно пересчитываются, поэтому создаем заново
+        print(f"  {SUMMARY_TABLE}: пересоздание (точность {scale} -> {SUMMARY_SCALE})")
+        for name in triggers:
+            db.cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+        db.cur.execute(f"DROP TABLE {SUMMARY_TABLE}")
+        scale = None
+    if scale is None:
+        print(f"  {SUMMARY_TABLE}: создание")
+        db.cur.execute(re.sub(r'^CREATE\s+TABLE', 'CREATE TABLE IF NOT EXISTS', table_sql,
+                              flags=re.IGNORECASE))
+
+    for name, sql in triggers.items():
+        print(f"  Триггер {name}")
+        db.cur.execute(f"DROP TRIGGER IF EXISTS {name}")
+        db.cur.execute(sql)
+    db.con.commit()
+
+    # Триггеры уже работают, пересчет приводит таблицу в соответствие с данными
+    print(f"  {SUMMARY_TABLE}: пересчет")
+    if not db.rebuild_financial_summary():
+        raise Exception("Не удалось пересчитать сводную таблицу")
+
+
+def migrate(db, path=SCHEMA_PATH):
+    """Все шаги обновления схемы"""
+    migrate_fulltext(db, path)
+    migrate_summary(db, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Обновление схемы существующей базы")
+    parser.add_argument('--schema', default=SCHEMA_PATH, help="SQL-скрипт схемы (БД.txt)")
+    args = parser.parse_args(argv)
+
+    from config import Database
+
+    db = Database()
+    try:
+        migrate(db, args.schema)
+        print("✓ Схема обновлена")
+        return 0
+    except Exception as e:
+        print(f"✗ Ошибка обновления схемы: {e}")
+        return 2
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,143 @@
+# query_cache.py
+from collections import OrderedDict
+from functools import wraps
+from time import monotonic
+import threading
+
+# Максимальное число закэшированных результатов
+CACHE_SIZE = 128
+# Ограничение суммарного числа строк во всех результатах кэша
+CACHE_MAX_ROWS = 200000
+# Результаты больше этого числа строк не кэшируются (полные таблицы уже хранит модель таблицы)
+CACHE_MAX_RESULT_ROWS = 20000
+# Время жизни результата (с): изменения других клиентов (импорт из командной строки,
+# generate_data.py, другие рабочие места) поколения не увеличивают
+CACHE_TTL = 30
+
+
+def result_rows(result):
+    """Число строк результата (одиночная запись считается за одну строку)"""
+    return len(result) if isinstance(result, (list, tuple)) else 1
+
+
+class QueryCache:
+    """LRU-кэш результатов запросов с поколениями таблиц
+
+    Ключ записи включает имя метода, аргументы и номера поколений таблиц, из которых
+    читает запрос. Любое изменение таблицы через этот процесс увеличивает ее поколение,
+    поэтому устаревший результат больше никогда не будет найден по ключу. Изменения,
+    сделанные в обход процесса, видны не позже чем через ttl секунд.
+    """
+
+    def __init__(self, max_size=CACHE_SIZE, max_rows=CACHE_MAX_ROWS,
+                 max_result_rows=CACHE_MAX_RESULT_ROWS, ttl=CACHE_TTL):
+        self.max_size = max_size
+        self.max_rows = max_rows
+        self.max_result_rows = max_result_rows
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._rows = 0
+        self._generations = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.skipped = 0
+        self.expired = 0
+
+    def _key(self, name, args, kwargs, tables):
+        generations = tuple(self._generations.get(table, 0) for table in tables)
+        return name, args, tuple(sorted(kwargs.items())), tables, generations
+
+    def get_or_load(self, name, args, kwargs, tables, loader, store=True):
+        """Результат из кэша или вызов loader() с сохранением непустого результата
+
+        store=False - результат загружается, но не сохраняется (например, прочитан
+        внутри уже открытой транзакции и может быть ее старым снимком).
+        """
+        with self._lock:
+            key = self._key(name, args, kwargs, tables)
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, expires = entry
+                if monotonic() < expires:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return result
+                del self._entries[key]
+                self._rows -= result_rows(result)
+                self.expired += 1
+            self.misses += 1
+
+        result = loader()
+
+        # Пустой результат не кэшируется: методы Database возвращают [] и при ошибке
+        if not result or not store:
+            return result
+
+        rows = result_rows(result)
+        with self._lock:
+            if rows > self.max_result_rows:
+                self.skipped += 1
+                return result
+            # Если таблица изменилась во время загрузки, ключ уже устарел и не будет найден
+            if key in self._entries:
+                self._rows -= result_rows(self._entries[key][0])
+            self._entries[key] = (result, monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            self._rows += rows
+            while len(self._entries) > self.max_size or self._rows > self.max_rows:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._rows -= result_rows(evicted)
+                self.evictions += 1
+        return result
+
+    def invalidate(self, *tables):
+        """Увеличение поколения таблиц после изменения данных"""
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+            # Удаляем устаревшие записи сразу, не дожидаясь вытеснения
+            stale = [key for key in self._entries if set(key[3]) & set(tables)]
+            for key in stale:
+                self._rows -= result_rows(self._entries.pop(key)[0])
+
+    def clear(self):
+        """Полная очистка кэша"""
+        with self._lock:
+            self._entries.clear()
+            self._rows = 0
+
+    def stats(self):
+        """Статистика попаданий и промахов"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'rows': self._rows,
+                'max_rows': self.max_rows,
+                'skipped': self.skipped,
+                'expired': self.expired,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / total if total else 0.0,
+                'generations': dict(self._generations)
+            }
+
+
+def cached(*tables):
+    """Кэширование результата метода Database; tables - таблицы, из которых читает запрос
+
+    Результат сохраняется, только если self.can_cache() разрешает это перед загрузкой.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return self.cache.get_or_load(method.__name__, args, kwargs, tables,
+                                          lambda: method(self, *args, **kwargs),
+                                          store=self.can_cache())
+        return wrapper
+    return decorator
@@ -0,0 +1,311 @@
+# query_stats.py
+from datetime import datetime
+from time import perf_counter
+import json
+import logging
+import os
+import re
+import threading
+
+log = logging.getLogger(__name__)
+
+
+def slow_query_ms_from_env(default=500):
+    """Порог медленного запроса из переменной окружения FARMER_SLOW_QUERY_MS
+
+    FARMER_SLOW_QUERY_MS=200 - порог 200 мс, FARMER_SLOW_QUERY_MS=off - журнал отключен.
+    """
+    value = os.environ.get('FARMER_SLOW_QUERY_MS', '').strip()
+    if not value:
+        return default
+    if value.lower() in ('off', 'none'):
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        log.warning("Некорректное значение FARMER_SLOW_QUERY_MS=%r, используется %s мс",
+                    value, default)
+        return default
+
+
+# Запросы дольше этого порога (мс) пишутся в журнал медленных запросов вместе с EXPLAIN
+SLOW_QUERY_MS = slow_query_ms_from_env()
+# Файл журнала медленных запросов (None - только общий журнал logging)
+SLOW_QUERY_LOG = 'slow_queries.log'
+# Сколько последних медленных запросов хранится для выгрузки в JSON
+SLOW_QUERY_HISTORY = 100
+
+# Запросы, для которых MySQL умеет строить план выполнения
+EXPLAINABLE = re.compile(r'^\s*(SELECT|UPDATE|DELETE|INSERT|REPLACE)\b', re.IGNORECASE)
+
+slow_log = logging.getLogger('farmer.slow_queries')
+_slow_log_files = set()
+_slow_log_lock = threading.Lock()
+
+
+def normalize_statement(sql):
+    """Текст запроса без лишних пробелов и переводов строк (ключ статистики)"""
+    return ' '.join(str(sql).split())
+
+
+def redact_params(params):
+    """Параметры запроса без значений (только типы): в них бывают пароли и личные данные"""
+    if not params:
+        return []
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def row_size(row):
+    """Примерный объем строки результата в байтах"""
+    values = row.values() if isinstance(row, dict) else row
+    return sum(len(value) if isinstance(value, (str, bytes, bytearray)) else 8
+               for value in values)
+
+
+def _attach_slow_log_file(path):
+    """Подключение файла журнала медленных запросов (один обработчик на файл)"""
+    with _slow_log_lock:
+        if path in _slow_log_files:
+            return
+        handler = logging.FileHandler(path, encoding='utf-8', delay=True)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        slow_log.addHandler(handler)
+        _slow_log_files.add(path)
+
+
+class QueryStats:
+    """Статистика выполнения запросов: время, строки, объем и число вызовов по каждому запросу"""
+
+    def __init__(self, slow_query_ms=SLOW_QUERY_MS, slow_log_path=SLOW_QUERY_LOG,
+                 history=SLOW_QUERY_HISTORY):
+        self.slow_query_ms = slow_query_ms
+        self.slow_log_path = slow_log_path
+        self.history = history
+        self._statements = {}
+        self._slow = []
+        self._lock = threading.Lock()
+        self.started = datetime.now()
+
+    def is_slow(self, elapsed_ms):
+        return self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms
+
+    def record(self, statement, elapsed_ms, rows, size, failed=False):
+        """Учет одного выполнения запроса"""
+        with self._lock:
+            entry = self._statements.get(statement)
+            if entry is None:
+                entry = self._statements[statement] = {
+                    'statement': statement, 'calls': 0, 'errors': 0, 'slow': 0,
+                    'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0, 'bytes': 0,
+                }
+            entry['calls'] += 1
+            entry['errors'] += int(failed)
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['rows'] += rows
+            entry['bytes'] += size
+            if self.is_slow(elapsed_ms):
+                entry['slow'] += 1
+
+    def record_slow(self, statement, params, elapsed_ms, rows, plan=None):
+        """Запись медленного запроса в журнал (plan - строки EXPLAIN)
+
+        Значения параметров не сохраняются ни в журнале, ни в выгрузке - только их типы.
+        """
+        if self.slow_log_path:
+            _attach_slow_log_file(self.slow_log_path)
+
+        lines = [f"{elapsed_ms:.1f} мс, строк: {rows}", statement]
+        if params:
+            lines.append(f"Параметры: {redact_params(params)}")
+        if plan:
+            lines.append("EXPLAIN:")
+            lines.extend("  " + ", ".join(f"{key}={value}" for key, value in step.items()
+                                          if value is not None)
+                         for step in plan)
+        slow_log.warning("Медленный запрос: %s", "\n".join(lines))
+
+        with self._lock:
+            self._slow.append({
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'elapsed_ms': round(elapsed_ms, 3),
+                'rows': rows,
+                'statement': statement,
+                'params': redact_params(params),
+                'explain': [{key: str(value) if value is not None else None
+                             for key, value in step.items()} for step in plan or []],
+            })
+            del self._slow[:-self.history]
+
+    def summary(self):
+        """Итоги по всем запросам (для строки состояния)"""
+        with self._lock:
+            entries = list(self._statements.values())
+            return {
+                'queries': sum(entry['calls'] for entry in entries),
+                'errors': sum(entry['errors'] for entry in entries),
+                'slow': sum(entry['slow'] for entry in entries),
+                'total_ms': sum(entry['total_ms'] for entry in entries),
+                'rows': sum(entry['rows'] for entry in entries),
+                'bytes': sum(entry['bytes'] for entry in entries),
+            }
+
+    def snapshot(self):
+        """Полная статистика: запросы по убыванию суммарного времени и медленные запросы"""
+        summary = self.summary()
+        with self._lock:
+            statements = sorted((dict(entry) for entry in self._statements.values()),
+                                key=lambda entry: entry['total_ms'], reverse=True)
+            slow = list(self._slow)
+        for entry in statements:
+            entry['avg_ms'] = round(entry['total_ms'] / entry['calls'], 3)
+            entry['total_ms'] = round(entry['total_ms'], 3)
+            entry['max_ms'] = round(entry['max_ms'], 3)
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'slow_query_ms': self.slow_query_ms,
+            'summary': summary,
+            'statements': statements,
+            'slow_queries': slow,
+        }
+
+    def export_json(self, path, **extra):
+        """Выгрузка статистики в JSON (extra - дополнительные разделы, например кэш)"""
+        data = self.snapshot()
+        data.update(extra)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+
+    def reset(self):
+        with self._lock:
+            self._statements.clear()
+            self._slow.clear()
+            self.started = datetime.now()
+
+
+class InstrumentedCursor:
+    """Курсор MySQL с учетом времени, строк и объема каждого запроса
+
+    Время запроса - сумма времени execute и всех выборок его результата. Запрос
+    считается завершенным после выборки всех строк, следующего execute или close.
+    Для медленных запросов с полностью прочитанным результатом выполняется EXPLAIN.
+    """
+
+    def __init__(self, cursor, connection, stats):
+        self._cursor = cursor
+        self._connection = connection
+        self._stats = stats
+        self._active = None
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        row = self.fetchone()
+        while row is not None:
+            yield row
+            row = self.fetchone()
+
+    # ---------- Выполнение ----------
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        self._finish()
+        self._active = {'operation': operation, 'params': params, 'elapsed': 0.0,
+                        'rows': 0, 'bytes': 0, 'explain': True}
+        result = self._timed(self._cursor.execute, operation, params, *args, **kwargs)
+        if not self._cursor.with_rows:
+            self._finish()
+        return result
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        self._finish()
+        self._active = {'operation': operation, 'params': None, 'elapsed': 0.0,
+                        'rows': 0, 'bytes': 0, 'explain': False}
+        result = self._timed(self._cursor.executemany, operation, seq_params, *args, **kwargs)
+        self._finish()
+        return result
+
+    # ---------- Выборка ----------
+
+    def fetchone(self):
+        row = self._timed(self._cursor.fetchone)
+        if self._active is not None:
+            if row is None:
+                self._finish(exhausted=True)
+            else:
+                self._active['rows'] += 1
+                self._active['bytes'] += row_size(row)
+        return row
+
+    def fetchmany(self, size=None):
+        size = size or self._cursor.arraysize
+        rows = self._timed(self._cursor.fetchmany, size)
+        self._count(rows)
+        if len(rows) < size:
+            self._finish(exhausted=True)
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(self._cursor.fetchall)
+        self._count(rows)
+        self._finish(exhausted=True)
+        return rows
+
+    def close(self):
+        self._finish()
+        return self._cursor.close()
+
+    # ---------- Учет ----------
+
+    def _timed(self, call, *args, **kwargs):
+        started = perf_counter()
+        try:
+            return call(*args, **kwargs)
+        except Exception:
+            if self._active is not None:
+                self._active['elapsed'] += perf_counter() - started
+                self._finish(failed=True)
+            raise
+        finally:
+            if self._active is not None:
+                self._active['elapsed'] += perf_counter() - started
+
+    def _count(self, rows):
+        if self._active is not None and rows:
+            self._active['rows'] += len(rows)
+            # Объем оценивается по первой строке пачки, чтобы не обходить все значения
+            self._active['bytes'] += row_size(rows[0]) * len(rows)
+
+    def _finish(self, exhausted=False, failed=False):
+        active, self._active = self._active, None
+        if active is None:
+            return
+        statement = normalize_statement(active['operation'])
+        elapsed_ms = active['elapsed'] * 1000
+        self._stats.record(statement, elapsed_ms, active['rows'], active['bytes'], failed)
+        log.debug("%.1f мс, строк: %d: %s", elapsed_ms, active['rows'], statement)
+
+        if failed or not self._stats.is_slow(elapsed_ms):
+            return
+        plan = None
+        # EXPLAIN возможен только после чтения всего результата (иначе соединение занято)
+        if active['explain'] and (exhausted or not self._cursor.with_rows) \
+                and EXPLAINABLE.match(active['operation']):
+            plan = self._explain(active['operation'], active['params'])
+        self._stats.record_slow(statement, active['params'], elapsed_ms, active['rows'], plan)
+
+    def _explain(self, operation, params):
+        """План выполнения запроса (отдельный курсор, в статистику не попадает)"""
+        try:
+            cur = self._connection.cursor(dictionary=True)
+            try:
+                cur.execute("EXPLAIN " + operation, params)
+                return cur.fetchall()
+            finally:
+                cur.close()
+        except Exception as e:
+            log.warning("Не удалось получить EXPLAIN: %s", e)
+            return None
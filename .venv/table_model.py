@@ -0,0 +1,172 @@
+# table_model.py
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QVariant
+
+
+def resolve_columns(headers, sample_row):
+    """Сопоставление заголовков колонок с ключами строки (выполняется один раз на набор данных)"""
+    if not isinstance(sample_row, dict):
+        return list(range(len(headers)))
+
+    keys = list(sample_row.keys())
+    columns = []
+    for col_idx, header in enumerate(headers):
+        # Попробуем найти ключ по заголовку (разные возможные имена)
+        possible_keys = [str(header).lower(), str(header).replace(" ", "_").lower()]
+        key_to_use = next((key for key in keys if key.lower() in possible_keys), None)
+
+        if key_to_use is None:
+            # Если ключ не найден, используем ключ с тем же индексом
+            key_to_use = keys[col_idx] if col_idx < len(keys) else None
+        columns.append(key_to_use)
+    return columns
+
+
+class PagedTableModel(QAbstractTableModel):
+    """Модель таблицы с отрисовкой ячеек по требованию и постраничной подгрузкой строк"""
+
+    EMPTY_MESSAGE = "Нет данных для отображения"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._headers = []
+        self._columns = []
+        self._rows = []
+        self._message = None
+        self._fetch_page = None
+        self._key_field = None
+        self._page_size = 0
+        self._last_key = None
+        self._exhausted = True
+
+    # ---------- Источники данных ----------
+
+    def set_rows(self, data, headers=None):
+        """Отображение готового списка строк (отчеты, результаты поиска)"""
+        self.beginResetModel()
+        self._reset_state()
+        self._append(data, headers)
+        self.endResetModel()
+        return len(self._rows)
+
+    def set_pager(self, fetch_page, key_field, headers=None, page_size=500, first_page=None):
+        """Подключение постраничного источника: fetch_page(last_id, limit) -> список строк
+
+        first_page - уже загруженная (например, в фоне) первая страница.
+        """
+        self.beginResetModel()
+        self._reset_state()
+        self._fetch_page = fetch_page
+        self._key_field = key_field
+        self._page_size = page_size
+        if first_page is None:
+            first_page = fetch_page(None, page_size)
+        self._exhausted = len(first_page) < page_size
+        self._remember_last_key(first_page)
+        self._append(first_page, headers)
+        self.endResetModel()
+        return len(self._rows)
+
+    def set_message(self, message):
+        """Отображение одиночного сообщения вместо данных"""
+        self.beginResetModel()
+        self._reset_state()
+        self._message = message
+        self._headers = ["Сообщение"]
+        self.endResetModel()
+
+    def _reset_state(self):
+        self._headers = []
+        self._columns = []
+        self._rows = []
+        self._message = None
+        self._fetch_page = None
+        self._key_field = None
+        self._last_key = None
+        self._exhausted = True
+
+    def _append(self, data, headers=None):
+        """Преобразование строк в кортежи по заранее вычисленному сопоставлению колонок"""
+        if not data:
+            if not self._rows:
+                self._message = self.EMPTY_MESSAGE
+                self._headers = ["Сообщение"]
+            return
+
+        if not self._columns:
+            # Автоматически определяем заголовки если не заданы
+            if not headers:
+                if isinstance(data[0], dict):
+                    headers = list(data[0].keys())
+                else:
+                    headers = [f"Колонка {i + 1}" for i in range(len(data[0]))]
+            self._headers = [str(h) for h in headers]
+            self._columns = resolve_columns(self._headers, data[0])
+            self._message = None
+
+        columns = self._columns
+        if isinstance(data[0], dict):
+            self._rows.extend(tuple(row.get(key) if key is not None else None for key in columns)
+                              for row in data)
+        else:
+            self._rows.extend(tuple(row[i] if i < len(row) else None for i in columns)
+                              for row in data)
+
+    def _remember_last_key(self, page):
+        if page:
+            self._last_key = page[-1][self._key_field]
+
+    # ---------- Постраничная подгрузка ----------
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return self._fetch_page is not None and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        page = self._fetch_page(self._last_key, self._page_size)
+        self._exhausted = len(page) < self._page_size
+        if not page:
+            return
+        self._remember_last_key(page)
+
+        first = len(self._rows)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self._append(page)
+        self.endInsertRows()
+
+    # ---------- Интерфейс QAbstractTableModel ----------
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        if self._message is not None:
+            return 1
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return QVariant()
+        if self._message is not None:
+            return self._message
+        value = self._rows[index.row()][index.column()]
+        return '' if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return QVariant()
+        if orientation == Qt.Horizontal:
+            return self._headers[section] if section < len(self._headers) else QVariant()
+        return section + 1
+
+    def value(self, row, column):
+        """Исходное значение ячейки (None для строки-сообщения)"""
+        if self._message is not None or row >= len(self._rows):
+            return None
+        return self._rows[row][column]
@@ -0,0 +1,293 @@
+# test_importer.py
+"""Проверка импорта (без подключения к MySQL): python -m unittest test_importer"""
+import csv
+import os
+import tempfile
+import threading
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+from mysql.connector import Error
+import importer
+
+FARMERS = [
+    {'farmer_id': 1, 'full_name': 'Иванов Иван', 'login': 'ivanov'},
+    {'farmer_id': 2, 'full_name': 'Петров Петр', 'login': 'petrov1'},
+    {'farmer_id': 3, 'full_name': 'Петров Петр', 'login': 'petrov2'},
+]
+
+
+class FakeCursor:
+    """Курсор без базы: строки с названием BAD отклоняются сервером"""
+
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, params=None):
+        if sql.lstrip().startswith('SELECT'):
+            self.result = list(FARMERS)
+            return
+        if self.db.kill is not None:
+            self.db.kill()
+        if params[1] == 'BAD':
+            raise Error("Data too long for column 'need_name'")
+        self.db.pending.append(params)
+
+    def executemany(self, sql, seq_params):
+        if self.db.kill is not None:
+            self.db.kill()
+        if any(params[1] == 'BAD' for params in seq_params):
+            raise Error("Data too long for column 'need_name'")
+        self.db.pending.extend(seq_params)
+
+    def fetchall(self):
+        return self.result
+
+    def nextset(self):
+        return None
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def commit(self):
+        self.db.rows.extend(self.db.pending)
+        self.db.pending.clear()
+
+    def rollback(self):
+        self.db.pending.clear()
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.rows = []
+        self.pending = []
+        self.invalidated = []
+        # kill() вызывается перед каждым INSERT (имитация KILL QUERY)
+        self.kill = None
+        self.cur = FakeCursor(self)
+        self.con = FakeConnection(self)
+
+    def clear_unread_results(self):
+        pass
+
+    def begin(self):
+        pass
+
+    def invalidate(self, *tables):
+        self.invalidated.extend(tables)
+
+
+class ImporterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name):
+        return os.path.join(self.directory.name, name)
+
+    def write_csv(self, rows, encoding='utf-8-sig', name='needs.csv'):
+        path = self.path(name)
+        with open(path, 'w', newline='', encoding=encoding) as f:
+            writer = csv.writer(f, delimiter=';')
+            writer.writerow(['Логин', 'Название потребности', 'Цена'])
+            writer.writerows(rows)
+        return path
+
+    def read_errors(self, path):
+        with open(path, encoding='utf-8-sig') as f:
+            return [row for row in csv.reader(f)][1:]
+
+
+class ValueTest(unittest.TestCase):
+
+    def test_map_columns_ignores_case_and_spaces(self):
+        mapping = importer.map_columns([' Логин ', 'Название потребности', 'ЦЕНА', 'Лишняя'],
+                                       importer.NEED_COLUMNS)
+        self.assertEqual(mapping, {'farmer': ' Логин ', 'need_name': 'Название потребности',
+                                   'price': 'ЦЕНА'})
+
+    def test_map_columns_prefers_first_alias(self):
+        mapping = importer.map_columns(['login', 'farmer_id'], importer.NEED_COLUMNS)
+        self.assertEqual(mapping['farmer'], 'farmer_id')
+
+    def test_decimal(self):
+        cases = [
+            ('12,5', Decimal('12.50')),
+            (' 1 000.456 ', Decimal('1000.46')),
+            (7, Decimal('7.00')),
+            ('', None),
+            (None, None),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(importer._decimal(value, 'price'), expected)
+        self.assertEqual(importer._decimal('', 'price', default=Decimal(1)), Decimal(1))
+
+    def test_decimal_rejects_invalid_values(self):
+        for value in ('abc', '-1', '100000000', 'NaN', 'Infinity'):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    importer._decimal(value, 'price')
+        with self.assertRaises(ValueError):
+            importer._decimal(' ', 'price', required=True)
+
+    def test_date(self):
+        cases = [
+            ('2024-03-01', date(2024, 3, 1)),
+            ('01.03.2024', date(2024, 3, 1)),
+            ('01/03/2024', date(2024, 3, 1)),
+            (datetime(2024, 3, 1, 12, 30), date(2024, 3, 1)),
+            (date(2024, 3, 1), date(2024, 3, 1)),
+            ('', None),
+        ]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(importer._date(value, 'purchase_date'), expected)
+        with self.assertRaises(ValueError):
+            importer._date('31.02.2024', 'purchase_date')
+
+    def test_choice(self):
+        self.assertEqual(importer._choice(' Услуга ', 'need_type', importer.NEED_TYPES, 'Товар'),
+                         'Услуга')
+        self.assertEqual(importer._choice(None, 'need_type', importer.NEED_TYPES, 'Товар'), 'Товар')
+        with self.assertRaises(ValueError):
+            importer._choice('услуга', 'need_type', importer.NEED_TYPES, 'Товар')
+
+    def test_text_limit_is_in_bytes(self):
+        self.assertEqual(importer._text('я' * 100, 'notes', max_bytes=200), 'я' * 100)
+        with self.assertRaises(ValueError):
+            importer._text('я' * 101, 'notes', max_bytes=200)
+
+
+class FarmerLookupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.farmers = importer.FarmerLookup(FakeDatabase())
+
+    def test_resolve_by_id_login_and_name(self):
+        self.assertEqual(self.farmers.resolve('1'), 1)
+        self.assertEqual(self.farmers.resolve(' PETROV2 '), 3)
+        self.assertEqual(self.farmers.resolve('иванов иван'), 1)
+
+    def test_duplicate_name_requires_login(self):
+        with self.assertRaisesRegex(ValueError, 'нескольких фермеров'):
+            self.farmers.resolve('Петров Петр')
+
+    def test_unknown_farmer(self):
+        for value in ('', '99', 'sidorov'):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    self.farmers.resolve(value)
+
+
+class ImportFileTest(ImporterTestCase):
+
+    def test_rejected_chunk_is_retried_row_by_row(self):
+        path = self.write_csv([['ivanov', 'BAD' if i in (3, 7) else f'n{i}', '10']
+                               for i in range(10)])
+        errors_path = self.path('errors.csv')
+        db = FakeDatabase()
+        stats = importer.import_file(db, 'needs', path, errors_path, batch_size=4)
+        self.assertEqual(stats, {'processed': 10, 'imported': 8, 'failed': 2})
+        self.assertEqual(len(db.rows), 8)
+        # Номера строк файла (заголовок - строка 1)
+        self.assertEqual([line for line, _ in self.read_errors(errors_path)], ['5', '9'])
+        self.assertEqual(db.invalidated, ['needs'])
+
+    def test_invalid_values_are_reported_without_insert(self):
+        path = self.write_csv([['ivanov', 'n1', 'abc'], ['nobody', 'n2', '10'],
+                               ['ivanov', 'n3', '10']])
+        errors_path = self.path('errors.csv')
+        db = FakeDatabase()
+        stats = importer.import_file(db, 'needs', path, errors_path)
+        self.assertEqual(stats, {'processed': 3, 'imported': 1, 'failed': 2})
+        self.assertEqual([line for line, _ in self.read_errors(errors_path)], ['2', '3'])
+
+    def test_cancel_during_chunk_retry_rolls_back(self):
+        path = self.write_csv([['ivanov', f'n{i}', '10'] for i in range(8)])
+        cancel_event = threading.Event()
+        db = FakeDatabase()
+
+        def kill():
+            # Вторая пачка прерывается KILL QUERY после установки флага отмены
+            if db.rows:
+                cancel_event.set()
+                raise Error("Query execution was interrupted")
+        db.kill = kill
+
+        with self.assertRaises(importer.ImportCancelled) as raised:
+            importer.import_file(db, 'needs', path, self.path('errors.csv'), batch_size=4,
+                                 cancel_event=cancel_event)
+        self.assertEqual(raised.exception.stats['imported'], 4)
+        self.assertEqual(raised.exception.stats['failed'], 0)
+        self.assertEqual(len(db.rows), 4)
+        self.assertFalse(os.path.exists(self.path('errors.csv')))
+
+    def test_cancel_inside_row_retry_rolls_back_chunk(self):
+        path = self.write_csv([['ivanov', 'BAD' if i == 0 else f'n{i}', '10'] for i in range(4)])
+        cancel_event = threading.Event()
+        db = FakeDatabase()
+
+        def kill():
+            # Отмена приходит, когда часть строк пачки уже записана построчно
+            if len(db.pending) == 2:
+                cancel_event.set()
+                raise Error("Query execution was interrupted")
+        db.kill = kill
+
+        with self.assertRaises(importer.ImportCancelled) as raised:
+            importer.import_file(db, 'needs', path, self.path('errors.csv'),
+                                 cancel_event=cancel_event)
+        self.assertEqual(raised.exception.stats['imported'], 0)
+        self.assertEqual(db.rows, [])
+        # Прерванная строка не считается ошибкой данных
+        self.assertEqual([line for line, _ in self.read_errors(self.path('errors.csv'))], ['2'])
+
+    def test_missing_farmer_column(self):
+        path = self.path('needs.csv')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('need_name,price\nn1,10\n')
+        with self.assertRaisesRegex(Exception, 'нет колонки с фермером'):
+            importer.import_file(FakeDatabase(), 'needs', path)
+
+
+class EncodingTest(ImporterTestCase):
+
+    def test_utf8_with_bom(self):
+        path = self.write_csv([['ivanov', 'Семена', '10']])
+        self.assertEqual(importer.detect_encoding(path), 'utf-8-sig')
+        rows = list(importer.read_rows(path))
+        self.assertEqual(rows[0][1]['Название потребности'], 'Семена')
+
+    def test_cp1251_from_excel(self):
+        path = self.write_csv([['ivanov', 'Семена', '10']], encoding='cp1251')
+        self.assertEqual(importer.detect_encoding(path), 'cp1251')
+        rows = list(importer.read_rows(path))
+        self.assertEqual(rows[0][1]['Название потребности'], 'Семена')
+
+    def test_non_utf8_tail_is_detected_before_import(self):
+        # Кириллица появляется только в конце файла, после первых пачек
+        path = self.write_csv([['ivanov', f'n{i}', '10'] for i in range(2000)]
+                              + [['ivanov', 'Удобрения', '10']], encoding='cp1251')
+        db = FakeDatabase()
+        stats = importer.import_file(db, 'needs', path, batch_size=100)
+        self.assertEqual(stats['imported'], 2001)
+        self.assertEqual(db.rows[-1][1], 'Удобрения')
+
+    def test_undecodable_file_fails_before_first_chunk(self):
+        path = self.path('needs.csv')
+        with open(path, 'wb') as f:
+            f.write('Логин;Название потребности;Цена\nivanov;n1;10\n'.encode('utf-8'))
+            f.write(b'ivanov;\x98\xff;10\n')
+        db = FakeDatabase()
+        with self.assertRaisesRegex(Exception, 'кодировку'):
+            importer.import_file(db, 'needs', path, batch_size=1)
+        self.assertEqual(db.rows, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+# test_query_cache.py
+"""Проверка кэша запросов (без подключения к MySQL): python -m unittest test_query_cache"""
+import unittest
+from unittest import mock
+from query_cache import QueryCache, cached
+
+
+class CountingLoader:
+    """Загрузчик, считающий обращения к «базе»"""
+
+    def __init__(self, result):
+        self.result = result
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.result
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.cache = QueryCache()
+        self.products = [{'product_id': 1}]
+        self.calls = 0
+        self.in_transaction = False
+
+    def can_cache(self):
+        return not self.in_transaction
+
+    @cached('products')
+    def get_products(self, limit=None):
+        self.calls += 1
+        return list(self.products[:limit])
+
+
+class QueryCacheTest(unittest.TestCase):
+
+    def load(self, cache, loader, name='report', args=(), tables=('products',)):
+        return cache.get_or_load(name, args, {}, tables, loader)
+
+    def test_repeated_call_is_served_from_cache(self):
+        cache = QueryCache()
+        loader = CountingLoader([1, 2, 3])
+        self.assertEqual(self.load(cache, loader), [1, 2, 3])
+        self.assertEqual(self.load(cache, loader), [1, 2, 3])
+        self.assertEqual(loader.calls, 1)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+    def test_arguments_are_part_of_key(self):
+        cache = QueryCache()
+        first, second = CountingLoader([1]), CountingLoader([2])
+        self.assertEqual(self.load(cache, first, args=('a',)), [1])
+        self.assertEqual(self.load(cache, second, args=('b',)), [2])
+        self.assertEqual((first.calls, second.calls), (1, 1))
+
+    def test_invalidation_bumps_generation(self):
+        cache = QueryCache()
+        loader = CountingLoader([1])
+        self.load(cache, loader)
+        cache.invalidate('products')
+        self.load(cache, loader)
+        self.assertEqual(loader.calls, 2)
+        self.assertEqual(cache.stats()['generations'], {'products': 1})
+
+    def test_invalidation_only_affects_dependent_results(self):
+        cache = QueryCache()
+        products, needs = CountingLoader([1]), CountingLoader([2])
+        self.load(cache, products, name='products', tables=('products',))
+        self.load(cache, needs, name='needs', tables=('needs',))
+        cache.invalidate('needs')
+        self.load(cache, products, name='products', tables=('products',))
+        self.load(cache, needs, name='needs', tables=('needs',))
+        self.assertEqual((products.calls, needs.calls), (1, 2))
+        self.assertEqual(cache.stats()['size'], 2)
+
+    def test_result_loaded_during_invalidation_is_not_served(self):
+        cache = QueryCache()
+
+        def stale_loader():
+            # Таблица меняется, пока запрос выполняется
+            cache.invalidate('products')
+            return ['old']
+
+        self.load(cache, stale_loader)
+        fresh = CountingLoader(['new'])
+        self.assertEqual(self.load(cache, fresh), ['new'])
+        self.assertEqual(fresh.calls, 1)
+
+    def test_empty_result_is_not_cached(self):
+        cache = QueryCache()
+        loader = CountingLoader([])
+        self.load(cache, loader)
+        self.load(cache, loader)
+        self.assertEqual(loader.calls, 2)
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_lru_eviction_by_entry_count(self):
+        cache = QueryCache(max_size=2)
+        loaders = {name: CountingLoader([name]) for name in ('a', 'b', 'c')}
+        self.load(cache, loaders['a'], name='a')
+        self.load(cache, loaders['b'], name='b')
+        self.load(cache, loaders['a'], name='a')  # 'a' становится последним использованным
+        self.load(cache, loaders['c'], name='c')  # вытесняется 'b'
+        self.load(cache, loaders['a'], name='a')
+        self.load(cache, loaders['b'], name='b')
+        self.assertEqual(loaders['a'].calls, 1)
+        self.assertEqual(loaders['b'].calls, 2)
+        self.assertEqual(cache.stats()['evictions'], 2)
+
+    def test_eviction_by_total_rows(self):
+        cache = QueryCache(max_rows=10)
+        self.load(cache, CountingLoader(list(range(6))), name='a')
+        self.load(cache, CountingLoader(list(range(6))), name='b')
+        stats = cache.stats()
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['rows'], 6)
+        self.assertEqual(stats['evictions'], 1)
+
+    def test_large_result_is_not_cached(self):
+        cache = QueryCache(max_result_rows=5)
+        loader = CountingLoader(list(range(6)))
+        self.load(cache, loader)
+        self.load(cache, loader)
+        self.assertEqual(loader.calls, 2)
+        self.assertEqual(cache.stats()['rows'], 0)
+        self.assertEqual(cache.stats()['skipped'], 2)
+
+    def test_row_count_follows_invalidation_and_clear(self):
+        cache = QueryCache()
+        self.load(cache, CountingLoader([1, 2]), name='a', tables=('products',))
+        self.load(cache, CountingLoader([3]), name='b', tables=('needs',))
+        cache.invalidate('products')
+        self.assertEqual(cache.stats()['rows'], 1)
+        cache.clear()
+        self.assertEqual(cache.stats()['rows'], 0)
+
+    def test_result_expires_after_ttl(self):
+        cache = QueryCache(ttl=30)
+        loader = CountingLoader([1])
+        with mock.patch('query_cache.monotonic', return_value=100.0):
+            self.load(cache, loader)
+        with mock.patch('query_cache.monotonic', return_value=129.0):
+            self.load(cache, loader)
+        self.assertEqual(loader.calls, 1)
+        with mock.patch('query_cache.monotonic', return_value=131.0):
+            self.load(cache, loader)
+        self.assertEqual(loader.calls, 2)
+        stats = cache.stats()
+        self.assertEqual((stats['expired'], stats['size'], stats['rows']), (1, 1, 1))
+
+    def test_store_false_loads_without_caching(self):
+        cache = QueryCache()
+        loader = CountingLoader([1])
+        cache.get_or_load('report', (), {}, ('products',), loader, store=False)
+        cache.get_or_load('report', (), {}, ('products',), loader, store=False)
+        self.assertEqual(loader.calls, 2)
+        self.assertEqual(cache.stats()['size'], 0)
+
+    def test_read_inside_open_transaction_is_not_cached(self):
+        db = FakeDatabase()
+        db.in_transaction = True
+        db.get_products()
+        db.in_transaction = False
+        db.get_products()
+        db.get_products()
+        self.assertEqual(db.calls, 2)
+
+    def test_cached_decorator(self):
+        db = FakeDatabase()
+        self.assertEqual(db.get_products(), [{'product_id': 1}])
+        db.get_products()
+        self.assertEqual(db.calls, 1)
+        db.get_products(limit=1)
+        self.assertEqual(db.calls, 2)
+
+        db.products.append({'product_id': 2})
+        db.cache.invalidate('products')
+        self.assertEqual(len(db.get_products()), 2)
+        self.assertEqual(db.calls, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
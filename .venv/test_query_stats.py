@@ -0,0 +1,48 @@
+# test_query_stats.py
+"""Проверка статистики запросов (без подключения к MySQL): python -m unittest test_query_stats"""
+import os
+import unittest
+from unittest import mock
+from query_stats import QueryStats, redact_params, slow_query_ms_from_env
+
+
+class SlowQueryThresholdTest(unittest.TestCase):
+
+    def threshold(self, value):
+        with mock.patch.dict(os.environ, {'FARMER_SLOW_QUERY_MS': value}):
+            return slow_query_ms_from_env(default=500)
+
+    def test_threshold_from_environment(self):
+        cases = [('200', 200.0), (' 12.5 ', 12.5), ('', 500), ('off', None), ('None', None)]
+        for value, expected in cases:
+            with self.subTest(value=value):
+                self.assertEqual(self.threshold(value), expected)
+
+    def test_invalid_value_keeps_default(self):
+        with self.assertLogs('query_stats', 'WARNING'):
+            self.assertEqual(self.threshold('быстро'), 500)
+
+    def test_unset_variable(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('FARMER_SLOW_QUERY_MS', None)
+            self.assertEqual(slow_query_ms_from_env(default=500), 500)
+
+
+class RedactionTest(unittest.TestCase):
+
+    def test_only_types_are_kept(self):
+        self.assertEqual(redact_params(('ivanov', 'a' * 64)), ['str', 'str'])
+        self.assertEqual(redact_params({'login': 'ivanov', 'id': 1}), {'login': 'str', 'id': 'int'})
+        self.assertEqual(redact_params(None), [])
+
+    def test_slow_query_log_has_no_values(self):
+        stats = QueryStats(slow_query_ms=0, slow_log_path=None)
+        with self.assertLogs('farmer.slow_queries', 'WARNING') as logs:
+            stats.record_slow("SELECT * FROM farmers WHERE password_hash = %s",
+                              ('secret-hash',), 600.0, 1)
+        self.assertNotIn('secret-hash', "\n".join(logs.output))
+        self.assertNotIn('secret-hash', str(stats.snapshot()['slow_queries']))
+
+
+if __name__ == "__main__":
+    unittest.main()
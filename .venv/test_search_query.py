@@ -0,0 +1,87 @@
+# test_search_query.py
+"""Проверка построения поисковых запросов (без подключения к MySQL): python -m unittest test_search_query"""
+import unittest
+from config import Database, NGRAM_TOKEN_SIZE
+
+
+class FulltextQueryTest(unittest.TestCase):
+
+    def test_fulltext_query(self):
+        cases = [
+            ('пшеница', '+"пшеница"'),
+            ('  Иван   Петров ', '+"Иван" +"Петров"'),
+            # Операторы BOOLEAN MODE не передаются в запрос
+            ('+пшеница -рожь', '+"пшеница" +"рожь"'),
+            ('"озимая" (пшеница)*', '+"озимая" +"пшеница"'),
+            ('~мука <сорт> @2', '+"мука" +"сорт"'),
+            ('ab*cd', '+"ab" +"cd"'),
+            # Слова короче n-граммы индекс не находит
+            ('я ок', '+"ок"'),
+            # % и _ в MATCH не являются шаблонами
+            ('50% зерно_1', '+"50%" +"зерно_1"'),
+        ]
+        for term, expected in cases:
+            with self.subTest(term=term):
+                self.assertEqual(Database.fulltext_query(term), expected)
+
+    def test_fallback_when_no_word_fits_ngram(self):
+        for term in ('', '   ', 'я', 'а б в', '+-*', '"a"'):
+            with self.subTest(term=term):
+                self.assertIsNone(Database.fulltext_query(term))
+
+    def test_ngram_size(self):
+        word = 'ж' * NGRAM_TOKEN_SIZE
+        self.assertEqual(Database.fulltext_query(word), f'+"{word}"')
+        self.assertIsNone(Database.fulltext_query(word[:-1]))
+
+
+class LikePrefixTest(unittest.TestCase):
+
+    def test_like_prefix(self):
+        cases = [
+            ('Иван', 'Иван%'),
+            ('  Иван ', 'Иван%'),
+            ('', '%'),
+            ('50%', r'50\%%'),
+            ('a_b', r'a\_b%'),
+            ('c:\\dir', r'c:\\dir%'),
+            ('%_\\', r'\%\_\\%'),
+        ]
+        for term, expected in cases:
+            with self.subTest(term=term):
+                self.assertEqual(Database.like_prefix(term), expected)
+
+
+class SearchQueryTest(unittest.TestCase):
+
+    def test_search_farmers_uses_fulltext(self):
+        sql, params = Database.search_farmers_query('Иван', limit=50)
+        self.assertIn('MATCH(full_name, address, login)', sql)
+        self.assertIn('LIMIT %s', sql)
+        self.assertEqual(params, ['+"Иван"', '+"Иван"', 50])
+
+    def test_search_farmers_falls_back_to_like(self):
+        sql, params = Database.search_farmers_query('%')
+        self.assertNotIn('MATCH', sql)
+        self.assertNotIn('LIMIT', sql)
+        self.assertEqual(params, [r'\%%', r'\%%'])
+
+    def test_product_production(self):
+        sql, params = Database.product_production_query('Пшеница озимая')
+        self.assertIn('MATCH(p.product_name)', sql)
+        self.assertEqual(params, ['+"Пшеница" +"озимая"'] * 2)
+
+        sql, params = Database.product_production_query('_', limit=10)
+        self.assertIn('p.product_name LIKE %s', sql)
+        self.assertEqual(params, [r'\_%', 10])
+
+    def test_placeholders_match_params(self):
+        for term in ('пшеница', 'я', '50%'):
+            for build in (Database.search_farmers_query, Database.product_production_query):
+                with self.subTest(term=term, query=build.__name__):
+                    sql, params = build(term, limit=5)
+                    self.assertEqual(sql.count('%s'), len(params))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+# workers.py
+from itertools import count
+import logging
+from PyQt5.QtCore import QObject, pyqtSignal
+
+log = logging.getLogger(__name__)
+
+
+class QueryDispatcher(QObject):
+    """Запуск запросов Database в фоне с доставкой результата в GUI-поток
+
+    Запросы группируются по ключу (например, "reports" для таблицы отчетов):
+    новый запрос с тем же ключом отменяет предыдущий, и его результат не отображается.
+    Запросы без ключа (key=None, например изменения данных) никогда не отменяются.
+    """
+
+    _finished = pyqtSignal(str, object, object)
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self._active = {}
+        self._counter = count()
+        self._finished.connect(self._deliver)
+
+    def run(self, key, method, *args, on_done=None, on_error=None):
+        """Фоновый вызов method(*args); on_done(result) / on_error(exception) - в GUI-потоке"""
+        if key is None:
+            key = f"task-{next(self._counter)}"
+        else:
+            self.cancel(key)
+        future = self.db.submit(method, *args)
+        self._active[key] = future
+        # Сигнал из рабочего потока доставляется в поток диспетчера через очередь событий
+        future.add_done_callback(lambda f: self._finished.emit(key, f, (on_done, on_error)))
+        return future
+
+    def cancel(self, key):
+        """Отмена запроса с заданным ключом"""
+        future = self._active.pop(key, None)
+        if future is not None:
+            self.db.cancel(future)
+
+    def cancel_all(self):
+        """Отмена всех отменяемых запросов (при закрытии окна)"""
+        for key in list(self._active):
+            if not key.startswith("task-"):
+                self.cancel(key)
+
+    def _deliver(self, key, future, callbacks):
+        if self._active.get(key) is not future:
+            return  # Запрос отменен или заменен более новым
+        del self._active[key]
+        if future.cancelled():
+            return
+
+        on_done, on_error = callbacks
+        error = future.exception()
+        if error is not None:
+            if on_error:
+                on_error(error)
+            else:
+                log.error("✗ Ошибка фонового запроса '%s': %s", key, error, exc_info=error)
+        elif on_done:
+            on_done(future.result())
+
+
+class ProgressReporter(QObject):
+    """Передача прогресса фоновой задачи в GUI-поток (вызывается как функция из любого потока)"""
+
+    changed = pyqtSignal(tuple)
+
+    def __call__(self, *values):
+        self.changed.emit(values)